@@ -14,9 +14,29 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    from app.utils.mongo_pool import init_mongo_pool
+    init_mongo_pool(app)
+
+    from app.utils.metrics import init_metrics
+    init_metrics(app)
     db.init_app(app)
     bcrypt.init_app(app)
     jwt.init_app(app)
+
+    from app.utils.admission_queue import init_admission_queue
+    init_admission_queue(app)
+
+    from app.utils.response_cache import init_response_cache
+    init_response_cache(app)
+
+    from app.utils.poster_uploads import init_poster_uploads
+    init_poster_uploads(app)
+
+    from app.utils.password_utils import init_password_hasher
+    init_password_hasher(app)
+
+    from app.utils.profiler import init_profiler
+    init_profiler(app)
     CORS(app, supports_credentials=True, origins=["http://localhost:5173"])
 
     @app.errorhandler(413)
@@ -27,10 +47,17 @@ def create_app():
     from app.routes.event_route import event_bp
     from app.routes.booking_route import booking_bp
     from app.routes.admin_routes import admin_bp
-    # app.register_blueprint(admin_bp, url_prefix="/api/admin")
+    app.register_blueprint(admin_bp, url_prefix="/api/admin")
     app.register_blueprint(booking_bp, url_prefix="/api/booking")
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(event_bp, url_prefix="/api/event")
 
+    if not app.config["LAZY_STARTUP"]:
+        from app.utils.lazy_views import resolve_views
+        resolve_views(app)
+
+    from app.cli import register_commands
+    register_commands(app)
+
 
     return app
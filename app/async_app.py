@@ -0,0 +1,279 @@
+"""
+Async serving mode for the read-heavy endpoints:
+
+    GET /api/event/filter, /api/event/<event_id>, /api/event/my-events
+    GET /api/booking/my
+
+A Quart app on PyMongo's native asyncio driver (AsyncMongoClient), so a
+slow query parks a coroutine instead of pinning a worker thread. It reads
+the same collections as the models, through the same filters, cursors and
+serializers as the Flask views, and returns the same payloads. Everything
+else stays on the Flask app; route these paths to this app instead:
+
+    hypercorn asgi:app
+
+Only this module needs Quart and the async driver; they are optional
+dependencies, listed in requirements-async.txt.
+"""
+import json
+import time
+import jwt as pyjwt
+from bson import ObjectId
+from pymongo import AsyncMongoClient
+from quart import Quart, request, current_app
+from config import Config
+from app.models.event_model import Event, SeatShard
+from app.models.booking_model import Booking
+from app.models.user_model import User
+from app.utils.event_filters import parse_event_filters, EventFilterError
+from app.utils.mongo_pool import client_options, read_preference
+from app.utils.pagination import (
+    PaginationError, decode_cursor, cursor_for, keyset_filter, keyset_sort,
+    encode_offset_cursor, decode_offset_cursor, parse_limit
+)
+from app.utils.serializers import (
+    EVENT_ROW, event_query_fields, event_rows, event_detail, booking_row, sharded_ids, orjson
+)
+
+EVENT_FIELDS = {field if field != "id" else "_id": 1 for field in event_query_fields(EVENT_ROW)}
+
+
+class AuthError(Exception):
+    """Ends a request with `payload`, as jwt_required() or a role check would."""
+
+    def __init__(self, payload, status):
+        super().__init__(payload)
+        self.payload = payload
+        self.status = status
+
+
+def create_async_app(config=Config):
+    app = Quart(__name__)
+    app.config.from_object(config)
+
+    settings = app.config["MONGODB_SETTINGS"]
+    # Same pool sizing and timeouts as the Flask app's client
+    client = AsyncMongoClient(settings.get("host"), **client_options(settings))
+    app.extensions["mongo_db"] = client.get_default_database(settings.get("db", "test"))
+    app.extensions["browse_read_preference"] = read_preference(
+        app.config["MONGODB_BROWSE_READ_PREFERENCE"], app.config["MONGODB_BROWSE_MAX_STALENESS"]
+    )
+    app.extensions["role_versions"] = {}
+
+    @app.errorhandler(AuthError)
+    async def auth_error(error):
+        return _json(error.payload, error.status)
+
+    app.add_url_rule("/api/event/filter", view_func=get_events)
+    app.add_url_rule("/api/event/my-events", view_func=get_vendor_events)
+    app.add_url_rule("/api/event/<event_id>", view_func=get_event_by_id)
+    app.add_url_rule("/api/booking/my", view_func=get_my_bookings)
+
+    @app.after_serving
+    async def close_client():
+        await client.close()
+
+    return app
+
+
+def _json(payload, status=200):
+    if orjson is not None:
+        body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+    else:
+        body = json.dumps(payload, separators=(",", ":"), sort_keys=True) + "\n"
+    return current_app.response_class(body, status=status, mimetype="application/json")
+
+
+def _db():
+    return current_app.extensions["mongo_db"]
+
+
+def _collection(model):
+    return _db()[model._get_collection_name()]
+
+
+def _browse_collection(model):
+    # browse_reads() of the async app
+    return _collection(model).with_options(read_preference=current_app.extensions["browse_read_preference"])
+
+
+# --- Auth: the checks of jwt_required() and the role decorators ---
+
+async def _role_version(user_id):
+    # Cached like auth_utils.current_role_version(); one event loop, no lock
+    cache = current_app.extensions["role_versions"]
+    now = time.monotonic()
+    cached = cache.get(user_id)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    user = await _collection(User).find_one({"_id": ObjectId(user_id)}, {"role_version": 1})
+    version = (user.get("role_version") or 0) if user else None
+    if len(cache) >= 10000:
+        cache.clear()
+    cache[user_id] = (now + current_app.config["ROLE_VERSION_CACHE_TTL"], version)
+    return version
+
+
+async def _require_role(role, message):
+    """Returns the user id of the request's access token if it has `role`."""
+    config = current_app.config
+
+    token = request.cookies.get(config.get("JWT_ACCESS_COOKIE_NAME", "access_token_cookie"))
+    if not token:
+        raise AuthError({"msg": "Missing cookie \"access_token_cookie\""}, 401)
+    try:
+        claims = pyjwt.decode(token, config["JWT_SECRET_KEY"],
+                              algorithms=[config.get("JWT_ALGORITHM", "HS256")])
+    except pyjwt.ExpiredSignatureError:
+        raise AuthError({"msg": "Token has expired"}, 401)
+    except pyjwt.InvalidTokenError as e:
+        raise AuthError({"msg": str(e)}, 422)
+    if claims.get("type") != "access":
+        raise AuthError({"msg": "Only non-refresh tokens are allowed"}, 422)
+
+    user_id = claims["sub"]
+    if "role" not in claims:
+        # Tokens issued before role claims existed
+        user = await _collection(User).find_one({"_id": ObjectId(user_id)}, {"role": 1})
+        if not user or user.get("role") != role:
+            raise AuthError({"error": message}, 403)
+        return user_id
+
+    if claims["role"] != role:
+        raise AuthError({"error": message}, 403)
+    if await _role_version(user_id) != claims.get("rv", 0):
+        raise AuthError({"error": "Your role has changed, please refresh your session"}, 401)
+    return user_id
+
+
+# --- Queries ---
+
+async def _seat_totals(docs):
+    ids = sharded_ids(docs)
+    if not ids:
+        return {}
+    rows = await (await _collection(SeatShard).aggregate(Event.seat_shards_pipeline(ids))).to_list()
+    return Event.seat_totals(ids, rows)
+
+
+async def _paginate(collection, query, projection, sort_field=None, descending=True):
+    """paginate() for a raw query on the async driver."""
+    limit = parse_limit(request.args.get("limit"), current_app.config)
+    page = {}
+
+    if request.args.get("count") == "estimate":
+        cap = current_app.config["PAGINATION_COUNT_CAP"]
+        total = await collection.count_documents(query, limit=cap)
+        page["estimated_total"] = total
+        page["total_is_capped"] = total >= cap
+
+    token = request.args.get("cursor")
+    if token:
+        query = {"$and": [query, keyset_filter(sort_field, descending, *decode_cursor(token))]}
+
+    cursor = collection.find(query, projection).sort(keyset_sort(sort_field, descending)).limit(limit + 1)
+    items = await cursor.to_list()
+
+    page["next_cursor"] = None
+    if len(items) > limit:
+        items = items[:limit]
+        page["next_cursor"] = cursor_for(items[-1], sort_field)
+    return items, page
+
+
+async def _paginate_ranked(collection, query, projection, sort=None):
+    """paginate_ranked() for a raw query on the async driver."""
+    limit = parse_limit(request.args.get("limit"), current_app.config)
+    token = request.args.get("cursor")
+    offset = decode_offset_cursor(token) if token else 0
+
+    maximum = current_app.config["RANKED_RESULTS_MAX"]
+    limit = max(0, min(limit, maximum - offset))
+    items = []
+    if limit:
+        cursor = collection.find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        items = await cursor.skip(offset).limit(limit + 1).to_list()
+
+    page = {"next_cursor": None}
+    if len(items) > limit:
+        items = items[:limit]
+        page["next_cursor"] = encode_offset_cursor(offset + limit, items[-1]["_id"])
+    return items, page
+
+
+# --- Views ---
+
+async def get_events():
+    try:
+        query, text, near = parse_event_filters(request.args, current_app.config)
+        events = _browse_collection(Event)
+        if text:
+            # Best matches first, like search_text().order_by("$text_score")
+            query["$text"] = {"$search": text}
+            projection = dict(EVENT_FIELDS, _text_score={"$meta": "textScore"})
+            docs, page = await _paginate_ranked(events, query, projection, [("_text_score", {"$meta": "textScore"})])
+        elif near:
+            docs, page = await _paginate_ranked(events, query, EVENT_FIELDS)
+        else:
+            docs, page = await _paginate(events, query, EVENT_FIELDS, "date", descending=False)
+    except (EventFilterError, PaginationError) as e:
+        return _json({"error": e.message}, e.status)
+
+    return _json({
+        "count": len(docs),
+        "events": event_rows(docs, seats=await _seat_totals(docs)),
+        **page
+    })
+
+
+async def get_event_by_id(event_id):
+    if not ObjectId.is_valid(event_id):
+        return _json({"error": "Event not found"}, 404)
+
+    event = await _browse_collection(Event).find_one({"_id": ObjectId(event_id)})
+    if not event:
+        return _json({"error": "Event not found"}, 404)
+
+    organizer = await _browse_collection(User).find_one({"_id": event["organizer"]}, {"name": 1})
+    seats = (await _seat_totals([event])).get(event["_id"], event.get("seats_available"))
+    return _json({"event": event_detail(event, organizer, seats)})
+
+
+async def get_vendor_events():
+    vendor_id = await _require_role("vendor", "Access forbidden: vendors only")
+    try:
+        docs, page = await _paginate(_collection(Event), {"organizer": ObjectId(vendor_id)},
+                                     EVENT_FIELDS, "date")
+    except PaginationError as e:
+        return _json({"error": e.message}, e.status)
+
+    return _json({"events": event_rows(docs, seats=await _seat_totals(docs)), **page})
+
+
+async def get_my_bookings():
+    user_id = await _require_role("customer", "Access forbidden: customers only")
+    try:
+        docs, page = await _paginate(_collection(Booking), {"customer": ObjectId(user_id)},
+                                     {"customer": 1, "event": 1, "booked_at": 1}, "booked_at")
+    except PaginationError as e:
+        return _json({"error": e.message}, e.status)
+
+    # One query for all customers and one for all events, like to_json_many()
+    customer_ids = list({doc["customer"] for doc in docs})
+    event_ids = list({doc["event"] for doc in docs})
+    customers = {
+        user["_id"]: user
+        for user in await _collection(User).find({"_id": {"$in": customer_ids}},
+                                                 {"name": 1, "email": 1}).to_list()
+    } if customer_ids else {}
+    events = await _collection(Event).find({"_id": {"$in": event_ids}}, EVENT_FIELDS).to_list() \
+        if event_ids else []
+    seats = await _seat_totals(events)
+    events = {row_id: row for row_id, row in
+              zip((event["_id"] for event in events), event_rows(events, seats=seats))}
+
+    bookings = [booking_row(doc, customers.get(doc["customer"]), events.get(doc["event"])) for doc in docs]
+    return _json({"count": len(bookings), "bookings": bookings, **page})
@@ -0,0 +1,115 @@
+import sys
+import click
+from app.utils.reservation_utils import shard_event_seats, unshard_event_seats, dedupe_bookings, ReservationError
+
+
+def register_commands(app):
+
+    @app.cli.command("shard-seats")
+    @click.argument("event_id")
+    @click.argument("shards", type=int)
+    def shard_seats(event_id, shards):
+        """Split an event's seats into SHARDS counters (0 merges them back)."""
+        try:
+            if shards > 0:
+                seats = shard_event_seats(event_id, shards)
+                click.echo(f"Moved {seats} seats into {shards} shards")
+            else:
+                seats = unshard_event_seats(event_id)
+                click.echo(f"Merged {seats} seats back into the event")
+        except ReservationError as e:
+            raise click.ClickException(e.message)
+
+    @app.cli.command("dedupe-bookings")
+    def dedupe_bookings_command():
+        """Delete duplicate bookings and build the unique (customer, event) index."""
+        from app.models.booking_model import Booking
+
+        deleted = dedupe_bookings()
+        click.echo(f"Deleted {deleted} duplicate bookings and gave their seats back")
+        Booking.ensure_indexes()
+
+    @app.cli.command("audit-indexes")
+    @click.option("--ensure", is_flag=True, help="Create missing indexes before auditing.")
+    @click.option("--drop-extra", is_flag=True, help="Drop indexes no model declares.")
+    def audit_indexes(ensure, drop_extra):
+        """Explain every registered query shape and report unindexed ones."""
+        from app.utils.index_audit import MODELS, audit_declared_indexes, audit_query_shapes
+
+        if ensure:
+            for model in MODELS:
+                model.ensure_indexes()
+
+        for collection, missing, extra in audit_declared_indexes():
+            for index in missing:
+                click.echo(f"{collection}: missing index {index}")
+            for index in extra:
+                click.echo(f"{collection}: index {index} is not declared by the model")
+                if drop_extra:
+                    model = next(m for m in MODELS if m._get_collection_name() == collection)
+                    model._get_collection().drop_index(index)
+                    click.echo(f"{collection}: dropped {index}")
+
+        failed = False
+        for name, stages, problems in audit_query_shapes():
+            status = "FAIL " + ", ".join(problems) if problems else "ok"
+            click.echo(f"{name}: {status} ({' > '.join(stages)})")
+            failed = failed or bool(problems)
+
+        if failed:
+            sys.exit(1)
+
+    @app.cli.command("backfill-location-keys")
+    @click.option("--batch-size", default=1000, show_default=True)
+    @click.option("--pause", default=0.1, show_default=True, help="Seconds to sleep between batches.")
+    def backfill_location_keys(batch_size, pause):
+        """Fill Event.country_key/city_key for events saved before they existed."""
+        from app.models.event_model import Event
+        from app.utils.backfill import backfill
+
+        def compute(doc):
+            return {
+                "country_key": Event.location_key(doc.get("country")),
+                "city_key": Event.location_key(doc.get("city"))
+            }
+
+        scanned, updated = backfill(Event, ["country", "city", "country_key", "city_key"],
+                                    compute, batch_size, pause)
+        click.echo(f"Scanned {scanned} events, updated {updated}")
+
+    @app.cli.command("backfill-user-search")
+    @click.option("--batch-size", default=1000, show_default=True)
+    @click.option("--pause", default=0.1, show_default=True, help="Seconds to sleep between batches.")
+    def backfill_user_search(batch_size, pause):
+        """Fill User.search_tokens for users saved before it existed."""
+        from app.models.user_model import User
+        from app.utils.backfill import backfill
+
+        def compute(doc):
+            return {"search_tokens": User.search_tokens_for(doc.get("name"), doc.get("email"))}
+
+        scanned, updated = backfill(User, ["name", "email", "search_tokens"], compute, batch_size, pause)
+        click.echo(f"Scanned {scanned} users, updated {updated}")
+
+    @app.cli.command("migrate-refresh-tokens")
+    def migrate_refresh_tokens():
+        """Delete refresh tokens stored before they were keyed by jti."""
+        from app.models.refresh_token_model import RefreshToken
+
+        collection = RefreshToken._get_collection()
+        # The old unique index on token refuses a second row without one
+        if "token_1" in collection.index_information():
+            collection.drop_index("token_1")
+            click.echo("Dropped the token_1 index")
+        # Lookups are by jti, so these rows could never be used again
+        result = collection.delete_many({"jti": {"$exists": False}})
+        RefreshToken.ensure_indexes()
+        click.echo(f"Deleted {result.deleted_count} refresh tokens without a jti")
+
+    @app.cli.command("rebuild-booking-stats")
+    def rebuild_booking_stats():
+        """Recompute the booking analytics rollups from the bookings collection."""
+        from app.utils.booking_stats import rebuild_booking_stats
+
+        events = rebuild_booking_stats()
+        click.echo(f"Rebuilt booking stats of {events} events")
@@ -1,27 +1,54 @@
-from flask import jsonify , request
+from flask import jsonify , request, current_app
 from flask_jwt_extended import jwt_required
 from app.models.user_model import User
-from app.utils.auth_utils import admin_required
+from app.utils.auth_utils import admin_required, forget_role_version
 from app.models.event_model import Event
+from app.models.refresh_token_model import RefreshToken
+from app.utils.pagination import paginate, page_limit, PaginationError
+from app.utils.response_cache import invalidate_event
+from app.utils.serializers import (
+    EVENT_SUMMARY_ROW, USER_ADMIN_ROW, event_query_fields, event_rows, users_by_id, json_response
+)
+from app.utils.exports import stream_export, ExportError
+from app.utils.user_search import ranked_user_search
+from datetime import datetime
+
+
+def _user_query(queryset):
+    # Raw documents with just the listed fields, serialized without Documents
+    return queryset.only(*USER_ADMIN_ROW.fields).as_pymongo()
+
+
+def _event_query(queryset):
+    return queryset.only(*event_query_fields(EVENT_SUMMARY_ROW)).as_pymongo()
 
 
 @jwt_required()
 @admin_required
 def get_all_users():
-    users = User.objects()
-    return jsonify({
+    try:
+        users, page = paginate(_user_query(User.objects()))
+    except PaginationError as e:
+        return jsonify({"error": e.message}), e.status
+
+    return json_response({
         "count": len(users),
-        "users": [
-            {
-                "id": str(user.id),
-                "name": user.name,
-                "email": user.email,
-                "role": user.role,
-                "created_at": user.created_at.strftime("%Y-%m-%d %H:%M")
-            }
-            for user in users
-        ]
-    }), 200
+        "users": [USER_ADMIN_ROW(user) for user in users],
+        **page
+    })
+
+@jwt_required()
+@admin_required
+def export_users():
+    try:
+        return stream_export(
+            _user_query(User.objects()),
+            USER_ADMIN_ROW.columns,
+            lambda users: [USER_ADMIN_ROW(user) for user in users],
+            "users"
+        )
+    except ExportError as e:
+        return jsonify({"error": e.message}), e.status
 
 @jwt_required()
 @admin_required
@@ -32,37 +59,35 @@ def update_user_role(user_id):
     if new_role not in ["admin", "vendor", "customer"]:
         return jsonify({"error": "Invalid role"}), 400
 
-    user = User.objects(id=user_id).first()
+    # Bumping role_version voids the role claim of the user's current tokens
+    user = User.objects(id=user_id).modify(set__role=new_role, inc__role_version=1, new=True)
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    user.role = new_role
-    user.save()
+    # Refresh tokens carry the role claims they will issue
+    RefreshToken.objects(user=user.id).update(set__role=new_role, set__role_version=user.role_version)
+    forget_role_version(user_id)
     return jsonify({"message": f"User role updated to '{new_role}'"}), 200
 
 @jwt_required()
 @admin_required
 def search_users():
-    query = request.args.get("name", "").strip().lower()
+    # Matches name and email prefixes; ?name= is the older spelling of ?q=
+    query = (request.args.get("q") or request.args.get("name", "")).strip()
 
     if not query:
-        return jsonify({"error": "Please provide a name query"}), 400
+        return jsonify({"error": "Please provide a name or email query"}), 400
 
-    users = User.objects(name__icontains=query)
+    try:
+        users, page = ranked_user_search(query)
+    except PaginationError as e:
+        return jsonify({"error": e.message}), e.status
 
-    return jsonify({
+    return json_response({
         "count": len(users),
-        "users": [
-            {
-                "id": str(user.id),
-                "name": user.name,
-                "email": user.email,
-                "role": user.role,
-                "created_at": user.created_at.strftime("%Y-%m-%d %H:%M")
-            }
-            for user in users
-        ]
-    }), 200
+        "users": [USER_ADMIN_ROW(user) for user in users],
+        **page
+    })
 @jwt_required()
 @admin_required
 def filter_users_by_role():
@@ -71,21 +96,16 @@ def filter_users_by_role():
     if role not in ["admin", "vendor", "customer"]:
         return jsonify({"error": "Invalid role. Must be admin, vendor, or customer."}), 400
 
-    users = User.objects(role=role)
+    try:
+        users, page = paginate(_user_query(User.objects(role=role)))
+    except PaginationError as e:
+        return jsonify({"error": e.message}), e.status
 
-    return jsonify({
+    return json_response({
         "count": len(users),
-        "users": [
-            {
-                "id": str(user.id),
-                "name": user.name,
-                "email": user.email,
-                "role": user.role,
-                "created_at": user.created_at.strftime("%Y-%m-%d %H:%M")
-            }
-            for user in users
-        ]
-    }), 200
+        "users": [USER_ADMIN_ROW(user) for user in users],
+        **page
+    })
 @jwt_required()
 @admin_required
 def delete_user(user_id):
@@ -95,28 +115,48 @@ def delete_user(user_id):
         return jsonify({"error": "User not found"}), 404
 
     user.delete()
+    RefreshToken.objects(user=user.id).delete()
+    forget_role_version(user_id)
     return jsonify({"message": "User deleted successfully"}), 200
 
 @jwt_required()
 @admin_required
 def get_all_events():
-    events = Event.objects()
+    try:
+        events, page = paginate(_event_query(Event.objects()), "date", descending=False)
+    except PaginationError as e:
+        return jsonify({"error": e.message}), e.status
 
-    return jsonify({
+    return json_response({
         "count": len(events),
-        "events": [
-            {
-                "id": str(event.id),
-                "title": event.title,
-                "organizer": str(event.organizer.id),
-                "date": event.date.strftime("%Y-%m-%d %H:%M"),
-                "city": event.city,
-                "country": event.country,
-                "seats_available": getattr(event, "seats_available", "N/A")
-            }
-            for event in events
-        ]
-    }), 200
+        "events": event_rows(events, EVENT_SUMMARY_ROW),
+        **page
+    })
+
+def _event_export_rows(events):
+    # One query for the organizers of the whole batch
+    organizers = users_by_id(event["organizer"] for event in events)
+    rows = event_rows(events, EVENT_SUMMARY_ROW)
+    for event, row in zip(events, rows):
+        organizer = organizers.get(event["organizer"], {})
+        row["organizer_name"] = organizer.get("name")
+        row["organizer_email"] = organizer.get("email")
+    return rows
+
+@jwt_required()
+@admin_required
+def export_events():
+    try:
+        return stream_export(
+            _event_query(Event.objects()),
+            EVENT_SUMMARY_ROW.columns + ("organizer_name", "organizer_email"),
+            _event_export_rows,
+            "events",
+            "date",
+            descending=False
+        )
+    except ExportError as e:
+        return jsonify({"error": e.message}), e.status
 
 @jwt_required()
 @admin_required
@@ -127,6 +167,7 @@ def delete_event(event_id):
         return jsonify({"error": "Event not found"}), 404
 
     event.delete()
+    invalidate_event(event.id, [(event.country_key, event.city_key)])
     return jsonify({"message": "Event deleted successfully"}), 200
 
 @jwt_required()
@@ -149,9 +190,9 @@ def filter_events():
     if organizer_id:
         query["organizer"] = organizer_id
     if country:
-        query["country__iexact"] = country
+        query["country_key"] = Event.location_key(country)
     if city:
-        query["city__iexact"] = city
+        query["city_key"] = Event.location_key(city)
 
     # Date range filters
     if from_date_str and to_date_str:
@@ -175,20 +216,60 @@ def filter_events():
         query["date__gte"] = from_date
         query["date__lte"] = to_date
 
-    events = Event.objects(**query)
+    try:
+        events, page = paginate(_event_query(Event.objects(**query)), "date", descending=False)
+    except PaginationError as e:
+        return jsonify({"error": e.message}), e.status
 
-    return jsonify({
+    return json_response({
         "count": len(events),
-        "events": [
-            {
-                "id": str(event.id),
-                "title": event.title,
-                "organizer": str(event.organizer.id),
-                "country": event.country,
-                "city": event.city,
-                "date": event.date.strftime("%Y-%m-%d %H:%M"),
-                "seats_available": getattr(event, "seats_available", "N/A")
-            }
-            for event in events
-        ]
-    }), 200
+        "events": event_rows(events, EVENT_SUMMARY_ROW),
+        **page
+    })
+
+@jwt_required()
+@admin_required
+def get_cache_stats():
+    cache = current_app.extensions.get("response_cache")
+    if cache is None:
+        return jsonify({"error": "Response cache is disabled"}), 404
+
+    return jsonify({"cache": cache.stats()}), 200
+
+
+@jwt_required()
+@admin_required
+def get_pool_stats():
+    # Connection pool of the worker process that serves this request
+    return jsonify({"pool": current_app.extensions["mongo_pool"].stats()}), 200
+
+
+@jwt_required()
+@admin_required
+def get_profiles():
+    profiler = current_app.extensions.get("profiler")
+    if profiler is None:
+        return jsonify({"error": "Profiler is disabled"}), 404
+
+    try:
+        limit = page_limit()
+    except PaginationError as e:
+        return jsonify({"error": e.message}), e.status
+    return jsonify({"profiles": profiler.store.recent(limit)}), 200
+
+
+@jwt_required()
+@admin_required
+def get_profile(profile_id):
+    profiler = current_app.extensions.get("profiler")
+    if profiler is None:
+        return jsonify({"error": "Profiler is disabled"}), 404
+
+    profile = profiler.store.get(profile_id)
+    if not profile:
+        return jsonify({"error": "Profile not found"}), 404
+
+    if request.args.get("format") == "json":
+        return jsonify({"profile": profile}), 200
+    # Collapsed stacks, ready for flamegraph.pl or speedscope
+    return current_app.response_class(profile["stacks"] + "\n", mimetype="text/plain")
@@ -1,13 +1,13 @@
-from flask import request, jsonify
-from app import bcrypt
+from flask import request, jsonify, current_app
 from mongoengine.errors import NotUniqueError
 from flask_jwt_extended import (
     create_access_token, create_refresh_token, jwt_required,
     set_access_cookies, unset_jwt_cookies, get_jwt_identity, get_jwt , set_refresh_cookies
 )
-from app.models.refresh_token_model import RefreshToken
 from app.models.user_model import User
-from datetime import datetime
+from app.utils.auth_utils import role_claims, load_current_user
+from app.utils.password_utils import PasswordHasherBusy
+from app.utils.token_store import store_refresh_token, consume_refresh_token, revoke_refresh_token
 
 
 def register_user():
@@ -22,8 +22,11 @@ def register_user():
     if not name or not email or not password or role not in ["vendor", "customer"]:
         return jsonify({"error": "Missing or invalid fields"}), 400
 
-    # Hash password
-    hashed_pw = bcrypt.generate_password_hash(password).decode('utf-8')
+    # Hash password in the hashing pool
+    try:
+        hashed_pw = current_app.extensions["password_hasher"].hash(password)
+    except PasswordHasherBusy:
+        return _busy()
 
     try:
         user = User(
@@ -38,6 +41,9 @@ def register_user():
 
     return jsonify({"message": "User registered successfully", "user": user.to_json()}), 201
 
+def _busy():
+    return jsonify({"error": "Server is busy, please try again shortly"}), 503, {"Retry-After": "2"}
+
 def login_user():
     data = request.get_json()
     email = data.get("email")
@@ -49,15 +55,32 @@ def login_user():
     # Find user by email
     user = User.objects(email=email).first()
 
-    # Check if user exists and password matches
-    if not user or not bcrypt.check_password_hash(user.password, password):
+    if not user:
         return jsonify({"error": "Invalid email or password"}), 401
 
+    # Check the password in the hashing pool, shedding load when it is full
+    hasher = current_app.extensions["password_hasher"]
+    try:
+        if not hasher.verify(user.password, password):
+            return jsonify({"error": "Invalid email or password"}), 401
+    except PasswordHasherBusy:
+        return _busy()
+
+    # Move the stored hash to the configured work factor; when the pool is
+    # busy, a later login does it
+    if hasher.needs_rehash(user.password):
+        try:
+            User.objects(id=user.id, password=user.password).update_one(
+                set__password=hasher.hash(password)
+            )
+        except PasswordHasherBusy:
+            pass
+
     # Create JWT token
-    access_token = create_access_token(identity=str(user.id))
+    access_token = create_access_token(identity=str(user.id), additional_claims=role_claims(user))
     refresh_token = create_refresh_token(identity=str(user.id))
 
-    RefreshToken(token=refresh_token, user=user).save()
+    store_refresh_token(refresh_token, user.id, role_claims(user))
 
     response = jsonify({"message": "Login successful"})
     set_access_cookies(response, access_token)
@@ -68,22 +91,19 @@ def login_user():
 def refresh():
     jwt_data = get_jwt()
     user_id = jwt_data["sub"]
-    jti = jwt_data["jti"]
 
-    # Verify refresh token exists in DB
-    token_entry = RefreshToken.objects(token=jti, user=user_id).first()
-    if not token_entry or token_entry.expires_at < datetime.utcnow():
+    # 1-2. Find and delete the refresh token in one atomic step
+    token_entry = consume_refresh_token(jwt_data)
+    if not token_entry:
         return jsonify({"error": "Invalid or expired refresh token"}), 403
 
-        # 2. Delete the old refresh token
-    token_entry.delete()
-
-    # 3. Generate new tokens
-    new_access_token = create_access_token(identity=user_id)
+    # 3. Generate new tokens, with the role claims stored on the token row
+    claims = role_claims(token_entry)
+    new_access_token = create_access_token(identity=user_id, additional_claims=claims)
     new_refresh_token = create_refresh_token(identity=user_id)
 
     # 4. Save new refresh token in DB
-    RefreshToken(token=new_refresh_token, user=user_id).save()
+    store_refresh_token(new_refresh_token, user_id, claims)
 
     # 5. Set both tokens in HttpOnly cookies
     response = jsonify({"message": "Token rotated"})
@@ -93,21 +113,18 @@ def refresh():
 
 @jwt_required()
 def logout():
-    user_id = get_jwt_identity()
-    refresh_token = request.cookies.get("refresh_token")
+    refresh_token = request.cookies.get(current_app.config["JWT_REFRESH_COOKIE_NAME"])
 
     if refresh_token:
-        RefreshToken.objects(token=refresh_token, user=user_id).delete()
+        revoke_refresh_token(refresh_token)
 
     response = jsonify({"message": "Logged out successfully"})
     unset_jwt_cookies(response)  # clears access_token_cookie and refresh_token_cookie
-    response.set_cookie("refresh_token", "", expires=0)  # explicitly clear in case not handled
     return response, 200
 
 @jwt_required()
 def get_current_user():
-    user_id = get_jwt_identity()
-    user = User.objects(id=user_id).first()
+    user = load_current_user()
 
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -1,82 +1,163 @@
-from flask import jsonify
+from flask import jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.user_model import User
 from app.models.event_model import Event
 from app.models.booking_model import Booking
-from app.utils.auth_utils import customer_required , vendor_required
+from app.utils.auth_utils import customer_required , vendor_required, load_current_user
+from app.utils.reservation_utils import reserve_seat, reserve_seats, release_seat, ReservationError
+from app.utils.admission_queue import QueueFull
+from app.utils.pagination import paginate, PaginationError
+from app.utils.exports import stream_export, ExportError
+from app.utils.serializers import minutes, users_by_id
 
 @jwt_required()
 @customer_required
 def book_event(event_id):
     user_id = get_jwt_identity()
-    user = User.objects(id=user_id).first()
 
-    # Check if event exists
-    event = Event.objects(id=event_id).first()
-    if not event:
-        return jsonify({"error": "Event not found"}), 404
-
-        # Check if seats are available
-    if event.seats_available <= 0:
-        return jsonify({"error": "Event is fully booked"}), 400
-
-    # Check if already booked
-    existing = Booking.objects(customer=user, event=event).first()
-    if existing:
-        return jsonify({"error": "You already booked this event"}), 400
-
-    # Save booking
-    booking = Booking(customer=user, event=event)
-    booking.save()
-    event.seats_available -= 1
-    event.save()
+    # In queue mode the request is only acknowledged; a worker books it later
+    if current_app.config["BOOKING_QUEUE_ENABLED"]:
+        try:
+            ticket = current_app.extensions["admission_queue"].submit(user_id, event_id)
+        except QueueFull:
+            return jsonify({"error": "Booking queue is full, please try again shortly"}), 503, {"Retry-After": "5"}
+        return jsonify({"message": "Booking queued", "ticket": _public_ticket(ticket)}), 202
+
+    user = load_current_user()
+
+    try:
+        booking = reserve_seat(user, event_id)
+    except ReservationError as e:
+        return jsonify({"error": e.message}), e.status
+
     return jsonify({"message": "Booking successful", "booking": booking.to_json()}), 201
 
+def _public_ticket(ticket):
+    return {
+        "id": ticket["id"],
+        "event_id": ticket["event_id"],
+        "status": ticket["status"],
+        "result": ticket["result"]
+    }
+
+@jwt_required()
+def get_booking_ticket(ticket_id):
+    user_id = get_jwt_identity()
+    ticket = current_app.extensions["admission_queue"].status(ticket_id)
+
+    if not ticket or ticket["user_id"] != user_id:
+        return jsonify({"error": "Ticket not found"}), 404
+
+    return jsonify({"ticket": _public_ticket(ticket)}), 200
+
 @jwt_required()
 @customer_required
 def get_my_bookings():
     user_id = get_jwt_identity()
-    user = User.objects(id=user_id).first()
 
-    bookings = Booking.objects(customer=user).order_by('-booked_at')
+    try:
+        bookings, page = paginate(Booking.objects(customer=user_id), "booked_at")
+    except PaginationError as e:
+        return jsonify({"error": e.message}), e.status
+    bookings = Booking.to_json_many(bookings)
 
     return jsonify({
         "count": len(bookings),
-        "bookings": [b.to_json() for b in bookings]
+        "bookings": bookings,
+        **page
     }), 200
 
+@jwt_required()
+@customer_required
+def book_group():
+    """
+    Books one seat of every event in {"event_ids": [...]} in one request,
+    all or nothing, and reports the outcome per event.
+    """
+    data = request.get_json(silent=True) or {}
+    event_ids = data.get("event_ids")
+    max_size = current_app.config["GROUP_BOOKING_MAX"]
+
+    if not isinstance(event_ids, list) or not event_ids or not all(isinstance(i, str) for i in event_ids):
+        return jsonify({"error": "event_ids should be a non-empty list of event ids"}), 400
+    if len(event_ids) > max_size:
+        return jsonify({"error": f"At most {max_size} events can be booked at once"}), 400
+    if len(set(event_ids)) != len(event_ids):
+        return jsonify({"error": "event_ids contains duplicates"}), 400
+
+    # Group bookings skip the admission queue: they are answered right away
+    ok, results = reserve_seats(load_current_user(), event_ids)
+    if not ok:
+        return jsonify({"error": "Group booking failed, nothing was booked", "results": results}), 409
+    return jsonify({"message": "Events booked successfully", "results": results}), 201
+
 @jwt_required()
 @customer_required
 def cancel_booking(booking_id):
     user_id = get_jwt_identity()
-    user = User.objects(id=user_id).first()
-
-    booking = Booking.objects(id=booking_id, customer=user).first()
 
-    if not booking:
-        return jsonify({"error": "Booking not found or not yours"}), 404
-
-    # Increase available seats
-    booking.event.seats_available += 1
-    booking.event.save()
-
-    booking.delete()
+    try:
+        release_seat(user_id, booking_id)
+    except ReservationError as e:
+        return jsonify({"error": e.message}), e.status
 
     return jsonify({"message": "Booking cancelled successfully"}), 200
 @jwt_required()
 @vendor_required
 def get_event_bookings(event_id):
     user_id = get_jwt_identity()
-    vendor = User.objects(id=user_id).first()
 
-    event = Event.objects(id=event_id, organizer=vendor).first()
+    event = Event.objects(id=event_id, organizer=user_id).first()
     if not event:
         return jsonify({"error": "Event not found or not owned by you"}), 404
 
-    bookings = Booking.objects(event=event).order_by("-booked_at")
+    try:
+        bookings, page = paginate(Booking.objects(event=event), "booked_at")
+    except PaginationError as e:
+        return jsonify({"error": e.message}), e.status
+    bookings = Booking.to_json_many(bookings)
 
     return jsonify({
         "event": event.to_json(),
         "count": len(bookings),
-        "bookings": [b.to_json() for b in bookings]
+        "bookings": bookings,
+        **page
     }), 200
+
+
+BOOKING_EXPORT_COLUMNS = ("id", "booked_at", "customer_id", "customer_name", "customer_email")
+
+
+def _booking_export_rows(bookings):
+    # One query for the customers of the whole batch
+    customers = users_by_id(booking["customer"] for booking in bookings)
+    rows = []
+    for booking in bookings:
+        customer = customers.get(booking["customer"], {})
+        rows.append({
+            "id": str(booking["_id"]),
+            "booked_at": minutes(booking.get("booked_at")),
+            "customer_id": str(booking["customer"]),
+            "customer_name": customer.get("name"),
+            "customer_email": customer.get("email")
+        })
+    return rows
+
+@jwt_required()
+@vendor_required
+def export_event_bookings(event_id):
+    user_id = get_jwt_identity()
+
+    event = Event.objects(id=event_id, organizer=user_id).only("id").first()
+    if not event:
+        return jsonify({"error": "Event not found or not owned by you"}), 404
+
+    try:
+        return stream_export(
+            Booking.objects(event=event.id).only("customer", "booked_at").as_pymongo(),
+            BOOKING_EXPORT_COLUMNS,
+            _booking_export_rows,
+            f"event_{event.id}_bookings",
+            "booked_at"
+        )
+    except ExportError as e:
+        return jsonify({"error": e.message}), e.status
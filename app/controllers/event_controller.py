@@ -1,73 +1,83 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.user_model import User
 from app.models.event_model import Event
 from datetime import datetime
-from app.utils.auth_utils import vendor_required
+from app.utils.auth_utils import vendor_required, load_current_user
+from app.utils.reservation_utils import shard_event_seats
+from app.utils.pagination import paginate, paginate_ranked, PaginationError
+from app.utils.response_cache import cached_response, invalidate_event, invalidate_locations, event_tag, scope_tag
+from app.utils.serializers import EVENT_ROW, event_query_fields, event_rows, event_detail, json_response
+from app.utils.booking_stats import vendor_analytics
+from app.utils.event_filters import parse_coordinates, parse_event_filters, EventFilterError
+from app.utils.mongo_pool import browse_reads
+from urllib.parse import urlencode
+import csv
+import io
 from bson import ObjectId
-from mongoengine.errors import ValidationError, DoesNotExist
-import os
-from werkzeug.utils import secure_filename
-from cloudinary.uploader import upload
-from cloudinary.exceptions import Error as CloudinaryError
-from app.config.cloudinary_config import cloudinary
+from mongoengine.errors import ValidationError
+from mongoengine.context_managers import no_dereference
 
 
-UPLOAD_TEMP = "temp_uploads"
+class EventInputError(Exception):
+    """Raised by _build_event() for a missing or malformed event field."""
 
-@jwt_required()
-@vendor_required
-def create_event():
-    user_id = get_jwt_identity()
-    user = User.objects(id=user_id).first()
-
-    title = request.form.get("title")
-    description = request.form.get("description")
-    date_str = request.form.get("date")
-    country = request.form.get("country")
-    city = request.form.get("city")
-    location = request.form.get("location")
-    seats = request.form.get("seats_available")
-    poster = request.files.get("poster")
-    poster_url1 = None
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
 
 
+def _build_event(fields, organizer):
+    """
+    Validates the fields of a new event (a form or an imported row) and
+    returns the unsaved (event, seat_shards). Raises EventInputError.
+    """
+    title = fields.get("title")
+    description = fields.get("description")
+    date_str = fields.get("date")
+    country = fields.get("country")
+    city = fields.get("city")
+    location = fields.get("location")
+    seats = fields.get("seats_available")
+    seat_shards = fields.get("seat_shards")
+
+    try:
+        coordinates = parse_coordinates(fields.get("latitude"), fields.get("longitude"))
+    except (ValueError, TypeError):
+        raise EventInputError("latitude and longitude should be given together, as decimal degrees")
 
     # Basic required field validation
     if not title or not date_str or not country or not city:
-        return jsonify({"error": "Missing required fields: title, date, country, or city"}), 400
+        raise EventInputError("Missing required fields: title, date, country, or city")
+
+    # Imported JSON rows may hold any type
+    for name, value in (("title", title), ("description", description), ("country", country),
+                        ("city", city), ("location", location)):
+        if value is not None and not isinstance(value, str):
+            raise EventInputError(f"{name} should be text")
 
     try:
         seats = int(seats)
         if seats < 1:
             raise ValueError
     except (ValueError, TypeError):
-        return jsonify({"error": "seats_available is required and should be a number ≥ 1"}), 400
-
-    try:
-        date = datetime.strptime(date_str, "%Y-%m-%d %H:%M")
-    except ValueError:
-        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD HH:MM"}), 400
-
-    if poster:
-        # 1. Save locally first
-        filename = secure_filename(poster.filename)
-        os.makedirs(UPLOAD_TEMP, exist_ok=True)
-        local_path = os.path.join(UPLOAD_TEMP, filename)
-        poster.save(local_path)
+        raise EventInputError("seats_available is required and should be a number ≥ 1")
 
+    # Optional: split the inventory of a hot event into counter shards
+    if seat_shards:
+        max_shards = current_app.config["SEAT_SHARDS_MAX"]
         try:
-            # 2. Upload to Cloudinary from local path
-            result = upload(local_path, folder="event_posters")
-            poster_url1 = result.get("secure_url")
-
-            # 3. Delete local temp file
-            os.remove(local_path)
+            seat_shards = int(seat_shards)
+            if seat_shards < 1 or seat_shards > max_shards:
+                raise ValueError
+        except (ValueError, TypeError):
+            raise EventInputError(f"seat_shards should be a number between 1 and {max_shards}")
 
-        except CloudinaryError as e:
-            if os.path.exists(local_path):
-                os.remove(local_path)  # Always cleanup
-            return jsonify({"error": "Image upload failed", "details": str(e)}), 500
+    try:
+        date = datetime.strptime(date_str, "%Y-%m-%d %H:%M")
+    except (ValueError, TypeError):
+        raise EventInputError("Invalid date format. Use YYYY-MM-DD HH:MM")
 
     event = Event(
         title=title,
@@ -75,95 +85,196 @@ def create_event():
         date=date,
         country=country,
         city=city,
-        poster_url=poster_url1,
         location=location,
         seats_available = seats,
-        organizer=user
+        coordinates=coordinates,
+        organizer=organizer
     )
-    event.save()
+    return event, seat_shards
+
+
+@jwt_required()
+@vendor_required
+def create_event():
+    user = load_current_user()
+    poster = request.files.get("poster")
+
+    try:
+        event, seat_shards = _build_event(request.form, user)
+    except EventInputError as e:
+        return jsonify({"error": e.message}), e.status
+
+    # The poster is only spooled to disk here; a background worker uploads it
+    uploader = current_app.extensions["poster_uploader"]
+    upload = None
+    if poster:
+        upload = uploader.spool(poster)
+        event.poster_status = "pending"
+        event.poster_upload_id = upload[0]
+
+    try:
+        event.save()
+    except Exception:
+        if upload:
+            uploader.discard(upload[1])
+        raise
+
+    if upload:
+        uploader.submit(event.id, *upload)
+
+    if seat_shards:
+        shard_event_seats(event.id, seat_shards)
+        event.reload()
+
+    invalidate_event(event.id, [(event.country_key, event.city_key)])
 
     return jsonify({"message": "Event created successfully", "event": event.to_json()}), 201
 
 
-from flask import request, jsonify
-from app.models.event_model import Event
-from datetime import datetime
+def _import_rows():
+    """
+    The rows of an import request: a CSV file upload ("file"), a CSV body,
+    or a JSON list of objects, bare or under "events".
+    """
+    upload = request.files.get("file")
+    if upload:
+        return list(csv.DictReader(io.TextIOWrapper(upload.stream, encoding="utf-8-sig")))
+    if request.mimetype == "text/csv":
+        return list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
 
-def get_events():
-    country = request.args.get("country")
-    city = request.args.get("city")
-
-    # Start date parts
-    start_year = request.args.get("start_year", type=int)
-    start_month = request.args.get("start_month", type=int)
-    start_day = request.args.get("start_day", type=int)
-
-    # End date parts
-    end_year = request.args.get("end_year", type=int)
-    end_month = request.args.get("end_month", type=int)
-    end_day = request.args.get("end_day", type=int)
-
-    query = {}
-    if country:
-        query["country__iexact"] = country
-    if city:
-        query["city__iexact"] = city
-
-    # Build date range filter if both start and end date are valid
-    if start_year and start_month and start_day and end_year and end_month and end_day:
-        try:
-            from_date = datetime(start_year, start_month, start_day)
-            to_date = datetime(end_year, end_month, end_day, 23, 59, 59)
-            query["date__gte"] = from_date
-            query["date__lte"] = to_date
-        except ValueError:
-            return jsonify({"error": "Invalid date range"}), 400
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("events")
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise EventInputError("Send a CSV file, a CSV body, or a JSON list of events")
+    return data
 
-    events = Event.objects(**query)
+
+@jwt_required()
+@vendor_required
+def import_events():
+    """
+    Creates many events in one request. Every row is validated like a
+    create_event form; valid rows are written with batched inserts and
+    every row gets a result, so one bad row doesn't sink the import.
+    Posters can be added afterwards with update_event.
+    """
+    user = load_current_user()
+
+    try:
+        rows = _import_rows()
+    except (EventInputError, UnicodeDecodeError, csv.Error) as e:
+        message = e.message if isinstance(e, EventInputError) else "Could not read the CSV file"
+        return jsonify({"error": message}), 400
+
+    max_rows = current_app.config["EVENT_IMPORT_MAX_ROWS"]
+    if not rows:
+        return jsonify({"error": "No events to import"}), 400
+    if len(rows) > max_rows:
+        return jsonify({"error": f"At most {max_rows} events can be imported at once"}), 400
+
+    results = [None] * len(rows)
+    valid = []
+    for row_number, row in enumerate(rows):
+        try:
+            event, seat_shards = _build_event(row, user)
+            # insert() skips validation, so run it (and clean()) here
+            event.validate()
+        except EventInputError as e:
+            results[row_number] = {"row": row_number, "status": "error", "error": e.message}
+            continue
+        except ValidationError as e:
+            results[row_number] = {"row": row_number, "status": "error", "error": str(e)}
+            continue
+        valid.append((row_number, event, seat_shards))
+
+    batch_size = current_app.config["EVENT_IMPORT_BATCH_SIZE"]
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        ids = Event.objects.insert([event for _, event, _ in batch], load_bulk=False)
+        for (row_number, event, seat_shards), event_id in zip(batch, ids):
+            if seat_shards:
+                shard_event_seats(event_id, seat_shards)
+            results[row_number] = {"row": row_number, "status": "created", "id": str(event_id)}
+
+    invalidate_locations({(event.country_key, event.city_key) for _, event, _ in valid})
 
     return jsonify({
+        "created": len(valid),
+        "failed": len(rows) - len(valid),
+        "results": results
+    }), 201 if valid else 400
+
+
+def _events_cache_key():
+    # Same filters in any order or letter case share one entry
+    args = sorted(
+        (key, Event.location_key(value) if key in ("country", "city") else value)
+        for key, value in request.args.items(multi=True) if value
+    )
+    return "events:filter:" + urlencode(args)
+
+
+def _events_cache_tags(payload):
+    tags = {scope_tag(Event.location_key(request.args.get("country")),
+                      Event.location_key(request.args.get("city")))}
+    tags.update(event_tag(event["id"]) for event in payload["events"])
+    return tags
+
+
+@cached_response(_events_cache_key, _events_cache_tags)
+def get_events():
+    # Location, date range, full-text and "near me" filters
+    try:
+        query, text, near = parse_event_filters(request.args, current_app.config)
+    except EventFilterError as e:
+        return jsonify({"error": e.message}), e.status
+
+    queryset = browse_reads(Event.objects(__raw__=query))
+    if text:
+        # Best matches first
+        queryset = queryset.search_text(text).order_by("$text_score")
+
+    # Raw documents with just the listed fields, serialized without Documents
+    queryset = queryset.only(*event_query_fields(EVENT_ROW)).as_pymongo()
+    try:
+        if text or near:
+            events, page = paginate_ranked(queryset)
+        else:
+            events, page = paginate(queryset, "date", descending=False)
+    except PaginationError as e:
+        return jsonify({"error": e.message}), e.status
+
+    return json_response({
         "count": len(events),
-        "events": [event.to_json() for event in events]
-    }), 200
+        "events": event_rows(events),
+        **page
+    })
 
 
+@cached_response(lambda event_id: f"events:detail:{event_id}",
+                 lambda payload, event_id: {event_tag(event_id)})
 def get_event_by_id(event_id):
-    try:
-        # Validate if event_id is a valid ObjectId
-        ObjectId(event_id)
-
-        # Find the event by ID
-        event = Event.objects.get(id=event_id)
-        organizer_name = event.organizer.name
-        event_data = {
-            "id": str(event.id),
-            "title": event.title,
-            "description": event.description,
-            "date": event.date.isoformat(),
-            "city": event.city,
-            "country": event.country,
-            "location": event.location,
-            "seats_available": event.seats_available,
-            "poster_url": event.poster_url,
-            "organizer_id": str(event.organizer.id),
-            "organizer_name": organizer_name  # Include the name here
-        }
-
-        return jsonify({"event": event_data}), 200
-
-    except (ValidationError, DoesNotExist):
+    # Validate if event_id is a valid ObjectId
+    if not ObjectId.is_valid(event_id):
+        return jsonify({"error": "Event not found"}), 404
+
+    # Find the event by ID, as a raw document
+    event = browse_reads(Event.objects(id=event_id)).as_pymongo().first()
+    if not event:
         return jsonify({"error": "Event not found"}), 404
 
+    organizer = browse_reads(User.objects(id=event["organizer"])).only("name").as_pymongo().first()
+    seats = Event.sum_seat_shards([event["_id"]]).get(event["_id"]) if event.get("seat_shards") \
+        else event.get("seats_available")
 
-from flask import jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models.event_model import Event
-from ..models.user_model import User
+    return json_response({"event": event_detail(event, organizer, seats)})
 
 
 # ... (your other controller functions) ...
 
 @jwt_required()
+@vendor_required
 def get_vendor_events():
     """
     Fetches all events created by the currently authenticated vendor using the correct
@@ -173,30 +284,58 @@ def get_vendor_events():
         # Get the ID of the currently logged-in user from the JWT token
         vendor_id = get_jwt_identity()
 
-        # Verify the user exists and has the 'vendor' role
-        user = User.objects(id=vendor_id).first()
-        if not user or user.role != 'vendor':
-            return jsonify({"error": "Unauthorized: Access is restricted to vendors only."}), 403
-
         # --- CORRECTED MONGOENGINE QUERY ---
         # Instead of .query.filter_by(), MongoEngine uses .objects()
-        # The minus sign ('-') in '-date' indicates descending order
-        vendor_events = Event.objects(organizer=vendor_id).order_by('-date')
+        # Pages are ordered by (-date, -_id) and keyed on the last row
+        queryset = Event.objects(organizer=vendor_id).only(*event_query_fields(EVENT_ROW)).as_pymongo()
+        vendor_events, page = paginate(queryset, "date")
 
-        # Format the events into a JSON-serializable list
-        events_list = [event.to_json() for event in vendor_events]
+        # Format the raw event documents into a JSON-serializable list
+        events_list = event_rows(vendor_events)
 
         # Return the list of events
-        return jsonify({"events": events_list}), 200
+        return json_response({"events": events_list, **page})
+
+    except PaginationError as e:
+        return jsonify({"error": e.message}), e.status
 
     except Exception as e:
         # Log the error for debugging and return a generic server error
-        print(f"Error in get_vendor_events: {e}")
+        current_app.logger.exception("get_vendor_events failed")
         return jsonify({"error": "An internal error occurred while fetching events.", "details": str(e)}), 500
 
 
+@jwt_required()
+@vendor_required
+def get_vendor_analytics():
+    """
+    Booking analytics of the vendor's events, served from the booking
+    rollups. Optional: event_id, and from/to (YYYY-MM-DD) for the daily
+    series, which defaults to the last 30 days.
+    """
+    event_id = request.args.get("event_id")
+    if event_id and not ObjectId.is_valid(event_id):
+        return jsonify({"error": "Event not found"}), 404
+
+    try:
+        from_day = request.args.get("from")
+        to_day = request.args.get("to")
+        from_day = datetime.strptime(from_day, "%Y-%m-%d") if from_day else None
+        to_day = datetime.strptime(to_day, "%Y-%m-%d") if to_day else None
+    except ValueError:
+        return jsonify({"error": "Date format should be YYYY-MM-DD"}), 400
+
+    return json_response(vendor_analytics(get_jwt_identity(), event_id, from_day, to_day))
+
+
 # ... other imports from flask, flask_jwt_extended, models, etc.
 
+def _organizer_id(event):
+    # Compares ids only, without loading the organizer's User document
+    with no_dereference(Event):
+        return event.organizer.id
+
+
 @jwt_required()
 def update_event(event_id):
     """
@@ -210,10 +349,11 @@ def update_event(event_id):
             return jsonify({"error": "Event not found."}), 404
 
         # Security check: Ensure the user is the organizer of this event
-        if str(event.organizer.id) != user_id:
+        if str(_organizer_id(event)) != user_id:
             return jsonify({"error": "Unauthorized: You are not the organizer of this event."}), 403
 
         data = request.form
+        old_location = (event.country_key, event.city_key)
 
         # Update fields if they are provided in the request
         if 'title' in data:
@@ -222,16 +362,37 @@ def update_event(event_id):
             event.description = data['description']
         if 'date' in data:
             event.date = datetime.strptime(data['date'], '%Y-%m-%d %H:%M')
-        # ... update other fields like city, country, location, seats_available ...
-
-        # Handle poster image update
+        if 'country' in data:
+            event.country = data['country']
+        if 'city' in data:
+            event.city = data['city']
+        if 'location' in data:
+            event.location = data['location']
+        if 'latitude' in data or 'longitude' in data:
+            try:
+                event.coordinates = parse_coordinates(data.get('latitude'), data.get('longitude'))
+            except (ValueError, TypeError):
+                return jsonify({"error": "latitude and longitude should be given together, as decimal degrees"}), 400
+        # ... update other fields like seats_available ...
+
+        # Handle poster image update: spool now, upload in the background
+        upload = None
         if 'poster' in request.files:
-            poster_image_file = request.files['poster']
-            # Your Cloudinary upload logic here
-            upload_result = cloudinary.uploader.upload(poster_image_file)
-            event.poster_url = upload_result.get('secure_url')
+            uploader = current_app.extensions["poster_uploader"]
+            upload = uploader.spool(request.files['poster'])
+            event.poster_status = "pending"
+            event.poster_upload_id = upload[0]
 
-        event.save()
+        try:
+            event.save()
+        except Exception:
+            if upload:
+                uploader.discard(upload[1])
+            raise
+
+        if upload:
+            uploader.submit(event.id, *upload)
+        invalidate_event(event.id, [old_location, (event.country_key, event.city_key)])
         return jsonify({"message": "Event updated successfully", "event": event.to_json()}), 200
 
     except Exception as e:
@@ -251,10 +412,11 @@ def delete_event(event_id):
             return jsonify({"error": "Event not found."}), 404
 
         # Security check: Ensure the user is the organizer
-        if str(event.organizer.id) != user_id:
+        if str(_organizer_id(event)) != user_id:
             return jsonify({"error": "Unauthorized: You are not the organizer of this event."}), 403
 
         event.delete()
+        invalidate_event(event.id, [(event.country_key, event.city_key)])
         return jsonify({"message": "Event deleted successfully"}), 200
 
     except Exception as e:
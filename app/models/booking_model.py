@@ -1,4 +1,5 @@
 from mongoengine import Document, ReferenceField, DateTimeField
+from mongoengine.context_managers import no_dereference
 from app.models.user_model import User
 from app.models.event_model import Event
 from datetime import datetime
@@ -8,7 +9,17 @@ class Booking(Document):
     event = ReferenceField(Event, required=True)
     booked_at = DateTimeField(default=datetime.utcnow)
 
-    meta = {'collection': 'bookings'}
+    meta = {
+        'collection': 'bookings',
+        'indexes': [
+            # One booking per customer per event, enforced by Mongo itself;
+            # 'flask dedupe-bookings' clears older duplicates before the build
+            {'fields': ['customer', 'event'], 'unique': True},
+            # "My bookings" and vendor listings, newest first
+            ('customer', '-booked_at', '-id'),
+            ('event', '-booked_at', '-id')
+        ]
+    }
 
     def to_json(self):
         """
@@ -31,3 +42,34 @@ class Booking(Document):
             "booked_at": self.booked_at.strftime("%Y-%m-%d %H:%M")
         }
 
+    @classmethod
+    def to_json_many(cls, bookings):
+        """
+        Serializes many bookings into the same shape as to_json(), but with
+        one batched query for all customers and one for all events instead
+        of dereferencing both for every booking.
+        """
+        with no_dereference(cls):
+            rows = [(booking, booking.customer.id, booking.event.id) for booking in bookings]
+
+        customer_ids = list({customer_id for _, customer_id, _ in rows})
+        event_ids = list({event_id for _, _, event_id in rows})
+
+        customers = {
+            user.id: {"id": str(user.id), "name": user.name, "email": user.email}
+            for user in User.objects(id__in=customer_ids).only("name", "email")
+        } if customer_ids else {}
+
+        events = list(Event.objects(id__in=event_ids)) if event_ids else []
+        seats = Event.reconcile_seats(events)
+        events = {event.id: event.to_json(seats.get(event.id)) for event in events}
+
+        return [
+            {
+                "id": str(booking.id),
+                "customer": customers.get(customer_id),
+                "event": events.get(event_id),
+                "booked_at": booking.booked_at.strftime("%Y-%m-%d %H:%M")
+            }
+            for booking, customer_id, event_id in rows
+        ]
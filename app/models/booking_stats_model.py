@@ -0,0 +1,30 @@
+from mongoengine import Document, ReferenceField, DateTimeField, IntField, CASCADE
+from app.models.event_model import Event
+
+class EventBookingStats(Document):
+    """
+    Running booking totals of one event, kept up to date with $inc by
+    reserve_seat() and release_seat() so analytics never count bookings.
+    """
+    event = ReferenceField(Event, required=True, unique=True, reverse_delete_rule=CASCADE)
+    # Bookings currently held; plus the event's free seats, its capacity
+    bookings = IntField(default=0)
+    cancellations = IntField(default=0)
+
+    meta = {'collection': 'event_booking_stats'}
+
+
+class DailyBookingStats(Document):
+    """Bookings made and cancelled on one (UTC) day, per event."""
+    event = ReferenceField(Event, required=True, reverse_delete_rule=CASCADE)
+    day = DateTimeField(required=True)
+    bookings = IntField(default=0)
+    cancellations = IntField(default=0)
+
+    meta = {
+        'collection': 'daily_booking_stats',
+        'indexes': [
+            # One row per event and day; also serves day ranges per event
+            {'fields': ['event', 'day'], 'unique': True}
+        ]
+    }
@@ -0,0 +1,36 @@
+from mongoengine import Document, StringField, DateTimeField, DictField
+from datetime import datetime
+
+class BookingTicket(Document):
+    """
+    A booking request waiting in the admission queue. Used by the "mongo"
+    queue backend so several server processes can share one queue.
+    """
+    user_id = StringField(required=True)
+    event_id = StringField(required=True)
+    status = StringField(required=True, default="queued",
+                         choices=("queued", "processing", "confirmed", "rejected"))
+    result = DictField()
+    created_at = DateTimeField(default=datetime.utcnow)
+    # When a worker took it; "processing" tickets claimed too long ago are requeued
+    claimed_at = DateTimeField()
+    # Set once finished, BOOKING_QUEUE_TICKET_TTL ahead
+    expires_at = DateTimeField()
+
+    meta = {
+        'collection': 'booking_tickets',
+        'indexes': [
+            ('status', 'created_at'),
+            # Mongo removes finished tickets once expires_at has passed
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0}
+        ]
+    }
+
+    def to_ticket(self):
+        return {
+            "id": str(self.id),
+            "user_id": self.user_id,
+            "event_id": self.event_id,
+            "status": self.status,
+            "result": self.result or None
+        }
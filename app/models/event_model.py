@@ -1,30 +1,138 @@
-from mongoengine import Document, StringField, DateTimeField, ReferenceField , IntField
+from mongoengine import Document, StringField, DateTimeField, ReferenceField , IntField, DictField, PointField, CASCADE
+from mongoengine.context_managers import no_dereference
 from app.models.user_model import User
 from datetime import datetime
 
 class Event(Document):
     title = StringField(required=True)
-    seats_available = IntField(required=True, min_value=1)
+    seats_available = IntField(required=True, min_value=0)
+    # Number of SeatShard counters holding this event's inventory (0 = not sharded)
+    seat_shards = IntField(default=0, min_value=0)
     description = StringField()
     date = DateTimeField(required=True)
     country = StringField(required=True)
     poster_url = StringField()
+    # Posters upload in the background: "pending" until poster_url is set
+    poster_status = StringField(choices=("pending", "ready", "failed"))
+    poster_upload_id = StringField()
+    # Resized copies of the poster: thumbnail, card and full -> URL
+    poster_variants = DictField()
     city = StringField(required=True)
     location = StringField()
     organizer = ReferenceField(User, required=True)
+    # Lower-cased copies of country/city so location filters are index seeks
+    country_key = StringField()
+    city_key = StringField()
+    # GeoJSON point, [longitude, latitude], for "near me" searches
+    coordinates = PointField(auto_index=False)
 
-    meta = {'collection': 'events'}
+    meta = {
+        'collection': 'events',
+        'indexes': [
+            # Browsing: date range filters and (date, _id) pagination
+            ('date', 'id'),
+            # Vendor listings and ownership checks
+            ('organizer', '-date', '-id'),
+            # Location filters, through the normalized keys
+            ('country_key', 'city_key', 'date', 'id'),
+            ('country_key', 'date', 'id'),
+            ('city_key', 'date', 'id'),
+            # Full-text search; a title match outranks a location or description match
+            {
+                'fields': ['$title', '$location', '$description'],
+                'default_language': 'english',
+                'weights': {'title': 10, 'location': 5, 'description': 1}
+            },
+            # "Near me" radius searches
+            '(coordinates'
+        ]
+    }
+
+    @staticmethod
+    def location_key(value):
+        return value.strip().lower() if value else value
+
+    def clean(self):
+        self.country_key = Event.location_key(self.country)
+        self.city_key = Event.location_key(self.city)
+
+    @classmethod
+    def reconcile_seats(cls, events):
+        """
+        Sums the seat shards of every sharded event in `events` with a single
+        aggregation. Returns {event_id: seats}; unsharded events are omitted.
+        """
+        return cls.sum_seat_shards([event.id for event in events if event.seat_shards])
+
+    @staticmethod
+    def sum_seat_shards(sharded_ids):
+        """Like reconcile_seats(), for the ids of events known to be sharded."""
+        if not sharded_ids:
+            return {}
+        return Event.seat_totals(sharded_ids, SeatShard.objects.aggregate(Event.seat_shards_pipeline(sharded_ids)))
+
+    @staticmethod
+    def seat_shards_pipeline(sharded_ids):
+        # Run against the seat_shards collection, by any driver
+        return [
+            {"$match": {"event": {"$in": sharded_ids}}},
+            {"$group": {"_id": "$event", "seats": {"$sum": "$seats"}}}
+        ]
+
+    @staticmethod
+    def seat_totals(sharded_ids, rows):
+        """{event_id: seats} from the rows of seat_shards_pipeline()."""
+        totals = {event_id: 0 for event_id in sharded_ids}
+        for row in rows:
+            totals[row["_id"]] = row["seats"]
+        return totals
+
+    def available_seats(self):
+        if not self.seat_shards:
+            return self.seats_available
+        return Event.reconcile_seats([self])[self.id]
+
+    def to_json(self, seats_available=None):
+        """
+        `seats_available` lets list endpoints pass totals they already
+        reconciled in bulk instead of aggregating once per sharded event.
+        """
+        if seats_available is None:
+            seats_available = self.available_seats()
+
+        # Only the organizer's id is needed, so don't load the User
+        with no_dereference(Event):
+            organizer_id = self.organizer.id
 
-    def to_json(self):
         return {
             "id": str(self.id),
             "title": self.title,
             "description": self.description,
-            "seats_available": self.seats_available,
+            "seats_available": seats_available,
             "date": self.date.strftime("%Y-%m-%d %H:%M"),
             "poster_url": self.poster_url,
+            "poster_status": self.poster_status,
+            "poster_variants": self.poster_variants or None,
             "country": self.country,
             "city": self.city,
             "location": self.location,
-            "organizer": str(self.organizer.id)
+            "organizer": str(organizer_id)
         }
+
+
+class SeatShard(Document):
+    """
+    One slice of a hot event's seat inventory. Bookings for sharded events
+    decrement a random shard, so writes spread over several small documents
+    instead of all queueing on the Event document.
+    """
+    event = ReferenceField(Event, required=True, reverse_delete_rule=CASCADE)
+    shard = IntField(required=True, min_value=0)
+    seats = IntField(required=True, default=0)
+
+    meta = {
+        'collection': 'seat_shards',
+        'indexes': [
+            {'fields': ['event', 'shard'], 'unique': True}
+        ]
+    }
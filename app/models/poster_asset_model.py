@@ -0,0 +1,13 @@
+from mongoengine import Document, StringField, DictField, DateTimeField
+from datetime import datetime
+
+class PosterAsset(Document):
+    """
+    Stored derivatives of one poster image, keyed by the SHA-256 of the
+    uploaded bytes so identical posters are only processed once.
+    """
+    sha256 = StringField(required=True, unique=True)
+    variants = DictField(required=True)  # variant name -> URL
+    created_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {'collection': 'poster_assets'}
@@ -1,11 +1,26 @@
-from mongoengine import Document, StringField, DateTimeField, ReferenceField
-from datetime import datetime, timedelta
+from mongoengine import Document, StringField, DateTimeField, ReferenceField, IntField
+from datetime import datetime
 from app.models.user_model import User
 
 class RefreshToken(Document):
-    token = StringField(required=True, unique=True)
+    # One row per issued refresh token, keyed by the token's JWT ID
+    jti = StringField(required=True)
     user = ReferenceField(User, required=True)
+    # Copies of the user's role claims, so rotation needs no User lookup;
+    # update_user_role keeps them current
+    role = StringField(required=True)
+    role_version = IntField(default=0)
     created_at = DateTimeField(default=datetime.utcnow)
-    expires_at = DateTimeField(default=lambda: datetime.utcnow() + timedelta(days=7))
+    expires_at = DateTimeField(required=True)
 
-    meta = {"collection": "refresh_tokens"}
+    meta = {
+        "collection": "refresh_tokens",
+        "indexes": [
+            # Partial, so rows saved before tokens had a jti can't fail the
+            # build; 'flask migrate-refresh-tokens' deletes them
+            {"fields": ["jti"], "unique": True, "partialFilterExpression": {"jti": {"$exists": True}}},
+            "user",
+            # Mongo removes tokens once expires_at has passed
+            {"fields": ["expires_at"], "expireAfterSeconds": 0}
+        ]
+    }
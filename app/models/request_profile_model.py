@@ -0,0 +1,45 @@
+from mongoengine import Document, StringField, DateTimeField, IntField, FloatField, BooleanField
+from datetime import datetime
+
+class RequestProfile(Document):
+    """
+    The sampled stacks of one profiled request, in collapsed-stack format.
+    Used by the "mongo" profile store, so any worker can serve a profile
+    another worker recorded.
+    """
+    # Generated by the server; request_id comes from the client's X-Request-ID
+    profile_id = StringField(primary_key=True)
+    request_id = StringField()
+    method = StringField()
+    path = StringField()
+    status = IntField()
+    duration_ms = FloatField()
+    samples = IntField(default=0)
+    interval_ms = FloatField()
+    # Rarer stacks were dropped to fit PROFILER_MAX_PROFILE_BYTES
+    truncated = BooleanField(default=False)
+    stacks = StringField()
+    created_at = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'request_profiles',
+        'indexes': [
+            # Newest first listings, and profiles are dropped after a day
+            {'fields': ['created_at'], 'expireAfterSeconds': 24 * 3600}
+        ]
+    }
+
+    def to_profile(self):
+        return {
+            "profile_id": str(self.profile_id),
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": self.duration_ms,
+            "samples": self.samples,
+            "interval_ms": self.interval_ms,
+            "truncated": self.truncated,
+            "stacks": self.stacks,
+            "created_at": self.created_at.strftime("%Y-%m-%d %H:%M:%S")
+        }
@@ -1,15 +1,52 @@
-from mongoengine import Document, StringField, EmailField
+import re
+import unicodedata
+from mongoengine import Document, StringField, EmailField, IntField, ListField
 
 class User(Document):
     name = StringField(required=True, max_length=100)
     email = EmailField(required=True, unique=True)
     password = StringField(required=True)
-    role = StringField(required=True, choices=("vendor", "customer"))
+    role = StringField(required=True, choices=("admin", "vendor", "customer"))
+    # Bumped on every role change; access tokens carrying an older value are refused
+    role_version = IntField(default=0)
+    # Normalized words of the name and email, for prefix search (see clean())
+    search_tokens = ListField(StringField())
 
     meta = {
-        'collection': 'users'
+        'collection': 'users',
+        'indexes': [
+            # Admin filter by role, newest first
+            ('role', '-id'),
+            # Admin search: anchored prefix regexes are index range scans
+            'search_tokens'
+        ]
     }
 
+    @staticmethod
+    def normalize(value):
+        """Lower-cased, accent-free text: "José" -> "jose"."""
+        decomposed = unicodedata.normalize("NFKD", value or "")
+        return "".join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+    @staticmethod
+    def search_words(value):
+        return [word for word in re.split(r"[^0-9a-z]+", User.normalize(value)) if word]
+
+    @staticmethod
+    def search_tokens_for(name, email):
+        """
+        The words of the name, the email local part and its words, the
+        domain and the whole address, so "ann.lee@mail.com" is found by
+        "ann", "lee", "ann.lee", "mail.com" or the full address.
+        """
+        email = User.normalize(email)
+        local, _, domain = email.partition("@")
+        tokens = User.search_words(name) + User.search_words(local) + [local, domain, email]
+        return sorted({token for token in tokens if token})
+
+    def clean(self):
+        self.search_tokens = User.search_tokens_for(self.name, self.email)
+
     def to_json(self):
         return {
             "id": str(self.id),
@@ -1,16 +1,21 @@
 from flask import Blueprint
-from app.controllers.admin_controller import (
-    get_all_users, update_user_role, search_users,filter_users_by_role , delete_user,
-get_all_events , delete_event , filter_events
-)
+from app.utils.lazy_views import lazy_views
+
+view = lazy_views("app.controllers.admin_controller")
 
 
 admin_bp = Blueprint("admin_bp", __name__)
-admin_bp.route("/users", methods=["GET"])(get_all_users)
-admin_bp.route("/user/<string:user_id>", methods=["DELETE"])(delete_user)
-admin_bp.route("/user/<string:user_id>/role", methods=["POST"])(update_user_role)
-admin_bp.route("/users/search", methods=["GET"])(search_users)
-admin_bp.route("/users/filter", methods=["GET"])(filter_users_by_role)
-admin_bp.route("/events", methods=["GET"])(get_all_events)
-admin_bp.route("/admin/event/<string:event_id>", methods=["DELETE"])(delete_event)
-admin_bp.route("/admin/events/filter", methods=["GET"])(filter_events)
\ No newline at end of file
+admin_bp.route("/users", methods=["GET"])(view("get_all_users"))
+admin_bp.route("/users/export", methods=["GET"])(view("export_users"))
+admin_bp.route("/user/<string:user_id>", methods=["DELETE"])(view("delete_user"))
+admin_bp.route("/user/<string:user_id>/role", methods=["POST"])(view("update_user_role"))
+admin_bp.route("/users/search", methods=["GET"])(view("search_users"))
+admin_bp.route("/users/filter", methods=["GET"])(view("filter_users_by_role"))
+admin_bp.route("/events", methods=["GET"])(view("get_all_events"))
+admin_bp.route("/events/export", methods=["GET"])(view("export_events"))
+admin_bp.route("/admin/event/<string:event_id>", methods=["DELETE"])(view("delete_event"))
+admin_bp.route("/admin/events/filter", methods=["GET"])(view("filter_events"))
+admin_bp.route("/cache/stats", methods=["GET"])(view("get_cache_stats"))
+admin_bp.route("/db/pool", methods=["GET"])(view("get_pool_stats"))
+admin_bp.route("/profiles", methods=["GET"])(view("get_profiles"))
+admin_bp.route("/profiles/<string:profile_id>", methods=["GET"])(view("get_profile"))
\ No newline at end of file
@@ -1,12 +1,14 @@
 from flask import Blueprint
-from app.controllers.auth_controller import register_user, login_user , get_current_user , refresh , logout
+from app.utils.lazy_views import lazy_views
+
+view = lazy_views("app.controllers.auth_controller")
 
 
 
 auth_bp = Blueprint("auth_bp", __name__)
 
-auth_bp.route("/register", methods=["POST"])(register_user)
-auth_bp.route("/login", methods=["POST"])(login_user)
-auth_bp.route("/me", methods=["GET"])(get_current_user)
-auth_bp.route("/refresh", methods=["POST"])(refresh)
-auth_bp.route("/logout", methods=["POST"])(logout)
\ No newline at end of file
+auth_bp.route("/register", methods=["POST"])(view("register_user"))
+auth_bp.route("/login", methods=["POST"])(view("login_user"))
+auth_bp.route("/me", methods=["GET"])(view("get_current_user"))
+auth_bp.route("/refresh", methods=["POST"])(view("refresh"))
+auth_bp.route("/logout", methods=["POST"])(view("logout"))
\ No newline at end of file
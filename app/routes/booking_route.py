@@ -1,8 +1,13 @@
 from flask import Blueprint
-from app.controllers.booking_controller import book_event, get_my_bookings, cancel_booking, get_event_bookings
+from app.utils.lazy_views import lazy_views
+
+view = lazy_views("app.controllers.booking_controller")
 
 booking_bp = Blueprint("booking_bp", __name__)
-booking_bp.route("/<event_id>", methods=["POST"])(book_event)
-booking_bp.route("/my", methods=["GET"])(get_my_bookings)
-booking_bp.route("/cancel/<booking_id>", methods=["DELETE"])(cancel_booking)
-booking_bp.route("/event/<event_id>", methods=["GET"])(get_event_bookings)
\ No newline at end of file
+booking_bp.route("/group", methods=["POST"])(view("book_group"))
+booking_bp.route("/<event_id>", methods=["POST"])(view("book_event"))
+booking_bp.route("/my", methods=["GET"])(view("get_my_bookings"))
+booking_bp.route("/cancel/<booking_id>", methods=["DELETE"])(view("cancel_booking"))
+booking_bp.route("/event/<event_id>", methods=["GET"])(view("get_event_bookings"))
+booking_bp.route("/event/<event_id>/export", methods=["GET"])(view("export_event_bookings"))
+booking_bp.route("/ticket/<ticket_id>", methods=["GET"])(view("get_booking_ticket"))
\ No newline at end of file
@@ -1,13 +1,14 @@
 from flask import Blueprint
-from app.controllers.event_controller import (create_event , get_events ,  get_event_by_id,get_vendor_events,
-update_event,
-delete_event
-)
+from app.utils.lazy_views import lazy_views
+
+view = lazy_views("app.controllers.event_controller")
 event_bp = Blueprint("event_bp", __name__)
-event_bp.route("/create", methods=["POST"])(create_event)
-event_bp.route("/filter", methods=["GET"])(get_events)
-event_bp.route("/my-events", methods=['GET'])(get_vendor_events)
+event_bp.route("/create", methods=["POST"])(view("create_event"))
+event_bp.route("/import", methods=["POST"])(view("import_events"))
+event_bp.route("/filter", methods=["GET"])(view("get_events"))
+event_bp.route("/my-events", methods=['GET'])(view("get_vendor_events"))
+event_bp.route("/analytics", methods=['GET'])(view("get_vendor_analytics"))
 # event_bp.route("/",methods=["GET"])(get_events_withoutlogin)
-event_bp.route("/<event_id>", methods=["GET"])(get_event_by_id)
-event_bp.route("/<event_id>", methods=['PUT'])(update_event)
-event_bp.route("/<event_id>", methods=['DELETE'])(delete_event)
\ No newline at end of file
+event_bp.route("/<event_id>", methods=["GET"])(view("get_event_by_id"))
+event_bp.route("/<event_id>", methods=['PUT'])(view("update_event"))
+event_bp.route("/<event_id>", methods=['DELETE'])(view("delete_event"))
\ No newline at end of file
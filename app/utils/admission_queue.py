@@ -0,0 +1,284 @@
+import importlib
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from mongoengine.errors import ValidationError
+from mongoengine.queryset.visitor import Q
+from app.models.booking_ticket_model import BookingTicket
+from app.models.user_model import User
+from app.utils.reservation_utils import reserve_seat, ReservationError
+
+
+MAX_BACKOFF = 30  # seconds a worker waits after repeated errors
+
+
+class QueueFull(Exception):
+    """Raised when the admission queue cannot take more booking requests."""
+
+
+class MemoryTicketBackend:
+    """
+    Keeps the queue and the tickets inside the current process. Good for
+    tests and single-process servers; tickets are lost on restart.
+    """
+
+    def __init__(self, max_size, ticket_ttl):
+        self._queue = queue.Queue(max_size)
+        self._tickets = OrderedDict()
+        self._finished_at = {}
+        self._claimed_at = {}
+        self._ticket_ttl = ticket_ttl
+        self._lock = threading.Lock()
+
+    def put(self, user_id, event_id):
+        ticket = {
+            "id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "event_id": event_id,
+            "status": "queued",
+            "result": None
+        }
+        with self._lock:
+            self._prune()
+            try:
+                self._queue.put_nowait(ticket["id"])
+            except queue.Full:
+                raise QueueFull()
+            self._tickets[ticket["id"]] = ticket
+        return dict(ticket)
+
+    def take(self, timeout):
+        try:
+            ticket_id = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            if ticket and ticket["status"] == "queued":
+                ticket["status"] = "processing"
+                self._claimed_at[ticket_id] = time.monotonic()
+                return dict(ticket)
+        return None
+
+    def finish(self, ticket_id, status, result):
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            if ticket:
+                ticket["status"] = status
+                ticket["result"] = result
+                self._finished_at[ticket_id] = time.monotonic()
+                self._claimed_at.pop(ticket_id, None)
+
+    def reclaim(self, lease):
+        """Queues again the tickets claimed more than `lease` seconds ago."""
+        cutoff = time.monotonic() - lease
+        reclaimed = 0
+        with self._lock:
+            for ticket_id, claimed_at in list(self._claimed_at.items()):
+                if claimed_at > cutoff:
+                    continue
+                try:
+                    self._queue.put_nowait(ticket_id)
+                except queue.Full:
+                    break
+                del self._claimed_at[ticket_id]
+                self._tickets[ticket_id]["status"] = "queued"
+                reclaimed += 1
+        return reclaimed
+
+    def get(self, ticket_id):
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            return dict(ticket) if ticket else None
+
+    def _prune(self):
+        # Tickets are kept in arrival order, so expired ones sit at the front
+        cutoff = time.monotonic() - self._ticket_ttl
+        while self._tickets:
+            ticket_id = next(iter(self._tickets))
+            finished_at = self._finished_at.get(ticket_id)
+            if finished_at is None or finished_at > cutoff:
+                break
+            del self._tickets[ticket_id]
+            del self._finished_at[ticket_id]
+
+
+class MongoTicketBackend:
+    """
+    Stores tickets in the booking_tickets collection. Every server process
+    can enqueue and drain, so this is the backend for multi-worker setups.
+    """
+
+    def __init__(self, max_size, ticket_ttl, poll_interval=0.05):
+        self._max_size = max_size
+        self._ticket_ttl = ticket_ttl
+        self._poll_interval = poll_interval
+
+    def put(self, user_id, event_id):
+        if BookingTicket.objects(status="queued").limit(self._max_size).count(with_limit_and_skip=True) >= self._max_size:
+            raise QueueFull()
+        ticket = BookingTicket(user_id=user_id, event_id=event_id)
+        ticket.save(force_insert=True)
+        return ticket.to_ticket()
+
+    def take(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            # Claim the oldest queued ticket; only one worker can win it
+            ticket = BookingTicket.objects(status="queued").order_by("created_at").modify(
+                set__status="processing", set__claimed_at=datetime.utcnow(), new=True
+            )
+            if ticket:
+                return ticket.to_ticket()
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self._poll_interval)
+
+    def finish(self, ticket_id, status, result):
+        BookingTicket.objects(id=ticket_id).update_one(
+            set__status=status, set__result=result,
+            set__expires_at=datetime.utcnow() + timedelta(seconds=self._ticket_ttl)
+        )
+
+    def reclaim(self, lease):
+        """
+        Queues again the tickets claimed more than `lease` seconds ago, e.g.
+        by a process that crashed. They keep created_at, so they go first.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=lease)
+        # Tickets claimed before claimed_at existed have none
+        stale = Q(claimed_at__lt=cutoff) | Q(claimed_at__exists=False)
+        return BookingTicket.objects(Q(status="processing") & stale).update(
+            set__status="queued", unset__claimed_at=True
+        )
+
+    def get(self, ticket_id):
+        try:
+            ticket = BookingTicket.objects(id=ticket_id).first()
+        except ValidationError:
+            return None
+        return ticket.to_ticket() if ticket else None
+
+
+BACKENDS = {
+    "memory": MemoryTicketBackend,
+    "mongo": MongoTicketBackend
+}
+
+
+def _load_backend(name):
+    if name in BACKENDS:
+        return BACKENDS[name]
+    # Anything else is a "package.module:ClassName" path
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class RateLimiter:
+    """Token bucket shared by the queue workers of one process."""
+
+    def __init__(self, rate):
+        self._rate = float(rate)
+        self._tokens = self._rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._rate, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+
+class AdmissionQueue:
+    """
+    Accepts booking requests immediately and drains them into the database
+    with a bounded pool of worker threads at a fixed maximum rate.
+    Workers are started on the first submitted ticket. A worker survives
+    database errors: it logs them, backs off and carries on, and tickets
+    left "processing" past BOOKING_QUEUE_LEASE are queued again.
+    """
+
+    def __init__(self, app):
+        config = app.config
+        backend_class = _load_backend(config["BOOKING_QUEUE_BACKEND"])
+        self.backend = backend_class(config["BOOKING_QUEUE_MAX_SIZE"], config["BOOKING_QUEUE_TICKET_TTL"])
+        self._app = app
+        self._workers = config["BOOKING_QUEUE_WORKERS"]
+        self._limiter = RateLimiter(config["BOOKING_QUEUE_RATE"])
+        self._lease = config["BOOKING_QUEUE_LEASE"]
+        self._next_reclaim = 0.0
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, user_id, event_id):
+        self._start_workers()
+        return self.backend.put(user_id, event_id)
+
+    def status(self, ticket_id):
+        return self.backend.get(ticket_id)
+
+    def _start_workers(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self._workers):
+                thread = threading.Thread(target=self._drain, name=f"booking-queue-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _drain(self):
+        failures = 0
+        while True:
+            try:
+                self._reclaim_stale()
+                self._limiter.acquire()
+                ticket = self.backend.take(timeout=1.0)
+                if ticket is not None:
+                    with self._app.app_context():
+                        status, result = self._process(ticket)
+                        self.backend.finish(ticket["id"], status, result)
+                failures = 0
+            except Exception:
+                # e.g. a replica set failover; a ticket taken here is reclaimed later
+                failures += 1
+                self._app.logger.exception("Booking queue worker error")
+                time.sleep(min(MAX_BACKOFF, 0.5 * 2 ** (failures - 1)))
+
+    def _reclaim_stale(self):
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_reclaim:
+                return
+            self._next_reclaim = now + self._lease / 2
+        # Custom backends may not support it
+        reclaim = getattr(self.backend, "reclaim", None)
+        reclaimed = reclaim(self._lease) if reclaim else 0
+        if reclaimed:
+            self._app.logger.warning("Requeued %d booking tickets left processing", reclaimed)
+
+    def _process(self, ticket):
+        try:
+            user = User.objects(id=ticket["user_id"]).first()
+            booking = reserve_seat(user, ticket["event_id"])
+            return "confirmed", {"booking": booking.to_json()}
+        except ReservationError as e:
+            return "rejected", {"error": e.message, "status": e.status}
+        except Exception:
+            self._app.logger.exception("Queued booking %s failed", ticket["id"])
+            return "rejected", {"error": "Booking failed", "status": 500}
+
+
+def init_admission_queue(app):
+    app.extensions["admission_queue"] = AdmissionQueue(app)
@@ -1,41 +1,85 @@
-from flask import jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+import threading
+import time
+from collections import OrderedDict
+from flask import jsonify, g, current_app
+from flask_jwt_extended import get_jwt, get_jwt_identity
 from functools import wraps
 from app.models.user_model import User
 
-def vendor_required(fn):
-    @wraps(fn)
-    def wrapper(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.objects(id=user_id).first()
-
-        if not user or user.role != "vendor":
-            return jsonify({"error": "Access forbidden: vendors only"}), 403
-
-        return fn(*args, **kwargs)
-    return wrapper
-def customer_required(fn):
-    @wraps(fn)
-    def wrapper(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.objects(id=user_id).first()
-        if not user or user.role != "customer":
-            return jsonify({"error": "Access forbidden: customers only"}), 403
-        return fn(*args, **kwargs)
-    return wrapper
-from flask import jsonify
-from flask_jwt_extended import get_jwt_identity
-from functools import wraps
-from app.models.user_model import User
 
-def admin_required(fn):
-    @wraps(fn)
-    def wrapper(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.objects(id=user_id).first()
+def role_claims(user):
+    """Extra access-token claims that let the role decorators skip Mongo."""
+    return {"role": user.role, "rv": user.role_version or 0}
+
+
+def load_current_user():
+    """
+    Returns the User behind the request's JWT, loading it at most once per
+    request no matter how many callers ask for it.
+    """
+    if "current_user" not in g:
+        g.current_user = User.objects(id=get_jwt_identity()).first()
+    return g.current_user
+
+
+# user_id -> (expires_at, role_version); None marks a deleted user
+_role_versions = OrderedDict()
+_role_versions_lock = threading.Lock()
+_ROLE_VERSIONS_MAX = 10000
+
+
+def current_role_version(user_id):
+    """
+    The user's role_version, cached for ROLE_VERSION_CACHE_TTL seconds so a
+    burst of requests from one user costs a single lookup.
+    """
+    now = time.monotonic()
+    with _role_versions_lock:
+        cached = _role_versions.get(user_id)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    user = User.objects(id=user_id).only("role_version").first()
+    version = (user.role_version or 0) if user else None
+
+    with _role_versions_lock:
+        _role_versions[user_id] = (now + current_app.config["ROLE_VERSION_CACHE_TTL"], version)
+        _role_versions.move_to_end(user_id)
+        while len(_role_versions) > _ROLE_VERSIONS_MAX:
+            _role_versions.popitem(last=False)
+    return version
+
+
+def forget_role_version(user_id):
+    with _role_versions_lock:
+        _role_versions.pop(str(user_id), None)
+
+
+def _role_required(role, message):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            claims = get_jwt()
+
+            if "role" not in claims:
+                # Tokens issued before role claims existed
+                user = load_current_user()
+                if not user or user.role != role:
+                    return jsonify({"error": message}), 403
+                return fn(*args, **kwargs)
+
+            if claims["role"] != role:
+                return jsonify({"error": message}), 403
+
+            # A role change or deletion bumps the version and voids old tokens
+            if current_role_version(claims["sub"]) != claims.get("rv", 0):
+                return jsonify({"error": "Your role has changed, please refresh your session"}), 401
+
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
 
-        if not user or user.role != "admin":
-            return jsonify({"error": "Access forbidden: admins only"}), 403
 
-        return fn(*args, **kwargs)
-    return wrapper
+vendor_required = _role_required("vendor", "Access forbidden: vendors only")
+customer_required = _role_required("customer", "Access forbidden: customers only")
+admin_required = _role_required("admin", "Access forbidden: admins only")
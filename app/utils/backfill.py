@@ -0,0 +1,38 @@
+import time
+from pymongo import UpdateOne
+
+
+def backfill(model, fields, compute, batch_size=1000, pause=0.1):
+    """
+    Walks a collection in _id order, `batch_size` documents at a time, and
+    writes whatever `compute(raw_doc)` returns as a $set, skipping documents
+    that are already up to date. Only `fields` are read. Sleeping `pause`
+    seconds between batches keeps the load on a live database low.
+
+    Returns (scanned, updated).
+    """
+    collection = model._get_collection()
+    scanned = updated = 0
+    last_id = None
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id else {}
+        batch = list(collection.find(query, {field: 1 for field in fields})
+                     .sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+
+        writes = []
+        for doc in batch:
+            changes = {key: value for key, value in compute(doc).items() if doc.get(key) != value}
+            if changes:
+                writes.append(UpdateOne({"_id": doc["_id"]}, {"$set": changes}))
+        if writes:
+            collection.bulk_write(writes, ordered=False)
+
+        scanned += len(batch)
+        updated += len(writes)
+        last_id = batch[-1]["_id"]
+        time.sleep(pause)
+
+    return scanned, updated
@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+from app.models.event_model import Event
+from app.models.booking_model import Booking
+from app.models.booking_stats_model import EventBookingStats, DailyBookingStats
+
+
+def _day(moment):
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def _record(event_id, moment, held, made, cancelled):
+    # Upserts, so the first booking of an event or a day creates its row
+    EventBookingStats.objects(event=event_id).update_one(
+        upsert=True, inc__bookings=held, inc__cancellations=cancelled
+    )
+    DailyBookingStats.objects(event=event_id, day=_day(moment)).update_one(
+        upsert=True, inc__bookings=made, inc__cancellations=cancelled
+    )
+
+
+def record_booking(event_id, booked_at=None):
+    _record(event_id, booked_at or datetime.utcnow(), 1, 1, 0)
+
+
+def record_cancellation(event_id, cancelled_at=None):
+    _record(event_id, cancelled_at or datetime.utcnow(), -1, 0, 1)
+
+
+def discard_booking(event_id, booked_at):
+    """Takes back record_booking() for a booking that was rolled back."""
+    _record(event_id, booked_at, -1, -1, 0)
+
+
+def rebuild_booking_stats():
+    """
+    Recomputes the booking counts of every rollup from the bookings
+    collection with two aggregation pipelines that $merge their results
+    server-side. Cancelled bookings are deleted, so cancellation counts
+    can't be recomputed and are kept as they are; daily booking counts
+    afterwards only include bookings that are still held.
+
+    Bookings made while this runs may be counted twice or not at all, so
+    run it when booking traffic is low. Returns the number of events with
+    bookings.
+    """
+    EventBookingStats.objects.update(set__bookings=0)
+    DailyBookingStats.objects.update(set__bookings=0)
+
+    bookings = Booking._get_collection()
+
+    per_event = [
+        {"$group": {"_id": "$event", "bookings": {"$sum": 1}}},
+        {"$project": {"_id": 0, "event": "$_id", "bookings": 1}},
+        {"$merge": {
+            "into": EventBookingStats._get_collection_name(),
+            "on": "event",
+            "whenMatched": "merge",
+            "whenNotMatched": "insert"
+        }}
+    ]
+    per_day = [
+        {"$group": {
+            "_id": {
+                "event": "$event",
+                "day": {"$dateFromParts": {
+                    "year": {"$year": "$booked_at"},
+                    "month": {"$month": "$booked_at"},
+                    "day": {"$dayOfMonth": "$booked_at"}
+                }}
+            },
+            "bookings": {"$sum": 1}
+        }},
+        {"$project": {"_id": 0, "event": "$_id.event", "day": "$_id.day", "bookings": 1}},
+        {"$merge": {
+            "into": DailyBookingStats._get_collection_name(),
+            "on": ["event", "day"],
+            "whenMatched": "merge",
+            "whenNotMatched": "insert"
+        }}
+    ]
+    # $merge needs the unique indexes its "on" fields rely on
+    EventBookingStats.ensure_indexes()
+    DailyBookingStats.ensure_indexes()
+    bookings.aggregate(per_event)
+    bookings.aggregate(per_day)
+    return EventBookingStats.objects(bookings__gt=0).count()
+
+
+def vendor_analytics(vendor_id, event_id=None, from_day=None, to_day=None):
+    """
+    Booking analytics of a vendor's events from the rollups: totals and
+    fill rate per event, and bookings/cancellations per day between
+    `from_day` and `to_day`. Costs a few queries per call, each O(events),
+    however many bookings there are.
+    """
+    query = {"organizer": vendor_id}
+    if event_id:
+        query["id"] = event_id
+    events = list(Event.objects(**query).only("title", "date", "seats_available", "seat_shards")
+                  .order_by("date").as_pymongo())
+    event_ids = [event["_id"] for event in events]
+    if not event_ids:
+        return {"events": [], "daily": [], "totals": {"bookings": 0, "cancellations": 0, "fill_rate": None}}
+
+    seats = Event.sum_seat_shards([event["_id"] for event in events if event.get("seat_shards")])
+    stats = {
+        row["event"]: row
+        for row in EventBookingStats.objects(event__in=event_ids).as_pymongo()
+    }
+
+    rows = []
+    for event in events:
+        stat = stats.get(event["_id"], {})
+        booked = stat.get("bookings", 0)
+        free = seats.get(event["_id"], event.get("seats_available") or 0)
+        capacity = booked + free
+        rows.append({
+            "event_id": str(event["_id"]),
+            "title": event.get("title"),
+            "date": event["date"].isoformat(" ", "minutes") if event.get("date") else None,
+            "bookings": booked,
+            "cancellations": stat.get("cancellations", 0),
+            "seats_available": free,
+            "capacity": capacity,
+            "fill_rate": round(booked / capacity, 4) if capacity else None
+        })
+
+    to_day = _day(to_day or datetime.utcnow())
+    from_day = _day(from_day or to_day - timedelta(days=29))
+    daily = {}
+    for row in DailyBookingStats.objects(event__in=event_ids, day__gte=from_day, day__lte=to_day).as_pymongo():
+        totals = daily.setdefault(row["day"], {"bookings": 0, "cancellations": 0})
+        totals["bookings"] += row.get("bookings", 0)
+        totals["cancellations"] += row.get("cancellations", 0)
+
+    booked = sum(row["bookings"] for row in rows)
+    capacity = sum(row["capacity"] for row in rows)
+    return {
+        "events": rows,
+        "daily": [
+            {"day": day.strftime("%Y-%m-%d"), **daily[day]}
+            for day in sorted(daily)
+        ],
+        "totals": {
+            "bookings": booked,
+            "cancellations": sum(row["cancellations"] for row in rows),
+            "fill_rate": round(booked / capacity, 4) if capacity else None
+        }
+    }
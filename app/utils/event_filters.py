@@ -0,0 +1,86 @@
+from datetime import datetime
+from app.models.event_model import Event
+
+EARTH_RADIUS_KM = 6378.1
+
+
+class EventFilterError(Exception):
+    """Raised for a malformed event listing filter."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def parse_coordinates(latitude, longitude):
+    """
+    Returns the GeoJSON [longitude, latitude] of an event, or None when
+    neither is given. Raises ValueError for a half or out-of-range pair.
+    """
+    if latitude in (None, "") and longitude in (None, ""):
+        return None
+    latitude, longitude = float(latitude), float(longitude)
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise ValueError
+    return [longitude, latitude]
+
+
+def _int_arg(args, name):
+    try:
+        return int(args.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_event_filters(args, config):
+    """
+    Turns the query string of an event listing into (query, text, near),
+    where `query` is a raw Mongo filter for the location, date and radius
+    filters, `text` the full-text search (or "") and `near` the GeoJSON
+    point searched around (or None). Shared by the sync and async views,
+    so both accept exactly the same filters.
+    """
+    query = {}
+    country = args.get("country")
+    city = args.get("city")
+    if country:
+        query["country_key"] = Event.location_key(country)
+    if city:
+        query["city_key"] = Event.location_key(city)
+
+    # Build date range filter if both start and end date are valid
+    parts = [_int_arg(args, name) for name in
+             ("start_year", "start_month", "start_day", "end_year", "end_month", "end_day")]
+    if all(parts):
+        try:
+            query["date"] = {
+                "$gte": datetime(parts[0], parts[1], parts[2]),
+                "$lte": datetime(parts[3], parts[4], parts[5], 23, 59, 59)
+            }
+        except ValueError:
+            raise EventFilterError("Invalid date range")
+
+    # Full-text search over title, location and description
+    text = args.get("q", "").strip()
+
+    # "Near me": events within radius_km of (lat, lng)
+    try:
+        near = parse_coordinates(args.get("lat"), args.get("lng"))
+        radius_km = float(args.get("radius_km", config["EVENT_NEAR_RADIUS_KM"]))
+        if not 0 < radius_km <= config["EVENT_NEAR_RADIUS_MAX_KM"]:
+            raise ValueError
+    except (ValueError, TypeError):
+        raise EventFilterError("Invalid lat, lng or radius_km")
+
+    if near and text:
+        # $text can't be combined with $near, so the radius becomes a plain filter
+        query["coordinates"] = {"$geoWithin": {"$centerSphere": [near, radius_km / EARTH_RADIUS_KM]}}
+    elif near:
+        # Nearest first, straight from the 2dsphere index
+        query["coordinates"] = {"$near": {
+            "$geometry": {"type": "Point", "coordinates": near},
+            "$maxDistance": radius_km * 1000
+        }}
+
+    return query, text, near
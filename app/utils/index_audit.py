@@ -0,0 +1,182 @@
+import re
+from datetime import datetime
+from bson import ObjectId
+from mongoengine.queryset.visitor import Q
+from app.models.user_model import User
+from app.models.event_model import Event, SeatShard
+from app.models.booking_model import Booking
+from app.models.refresh_token_model import RefreshToken
+from app.models.booking_ticket_model import BookingTicket
+from app.models.booking_stats_model import EventBookingStats, DailyBookingStats
+from app.models.request_profile_model import RequestProfile
+
+MODELS = [User, Event, SeatShard, Booking, RefreshToken, BookingTicket, EventBookingStats, DailyBookingStats,
+          RequestProfile]
+
+# name -> function returning a queryset with the same shape as a controller query
+QUERY_SHAPES = {}
+
+
+def query_shape(name):
+    """
+    Registers a query shape for `flask audit-indexes`. Whenever a controller
+    gets a new kind of query, add a matching shape here so the audit can
+    tell whether an index serves it.
+    """
+    def register(fn):
+        QUERY_SHAPES[name] = fn
+        return fn
+    return register
+
+
+# Any well-formed values do; only the plan matters
+SAMPLE_ID = ObjectId()
+SAMPLE_DATE = datetime(2030, 1, 1)
+
+
+@query_shape("events.browse")
+def _events_browse():
+    return Event.objects(date__gte=SAMPLE_DATE, date__lte=SAMPLE_DATE).order_by("date", "id")
+
+
+@query_shape("events.browse_by_location")
+def _events_browse_by_location():
+    return Event.objects(country_key="pk", city_key="lahore").order_by("date", "id")
+
+
+@query_shape("events.browse_by_country")
+def _events_browse_by_country():
+    return Event.objects(country_key="pk").order_by("date", "id")
+
+
+@query_shape("events.browse_by_city")
+def _events_browse_by_city():
+    return Event.objects(city_key="lahore").order_by("date", "id")
+
+
+@query_shape("events.search_text")
+def _events_search_text():
+    # The text index finds the matches; ranking them by score is always a
+    # sort of the matched rows only, so it is left out of the shape
+    return Event.objects.search_text("sample")
+
+
+@query_shape("events.near")
+def _events_near():
+    return Event.objects(coordinates__near=[0, 0], coordinates__max_distance=1000)
+
+
+@query_shape("events.by_organizer")
+def _events_by_organizer():
+    return Event.objects(organizer=SAMPLE_ID).order_by("-date", "-id")
+
+
+@query_shape("seat_shards.with_seats")
+def _seat_shards_with_seats():
+    return SeatShard.objects(event=SAMPLE_ID, seats__gt=0)
+
+
+@query_shape("bookings.by_customer")
+def _bookings_by_customer():
+    return Booking.objects(customer=SAMPLE_ID).order_by("-booked_at", "-id")
+
+
+@query_shape("bookings.by_event")
+def _bookings_by_event():
+    return Booking.objects(event=SAMPLE_ID).order_by("-booked_at", "-id")
+
+
+@query_shape("users.by_email")
+def _users_by_email():
+    return User.objects(email="someone@example.com")
+
+
+@query_shape("users.search")
+def _users_search():
+    return User.objects(__raw__={"$and": [{"search_tokens": re.compile("^sample")}]})
+
+
+@query_shape("users.by_role")
+def _users_by_role():
+    return User.objects(role="vendor").order_by("-id")
+
+
+@query_shape("refresh_tokens.by_jti")
+def _refresh_tokens_by_jti():
+    return RefreshToken.objects(jti="jti", user=SAMPLE_ID, expires_at__gt=SAMPLE_DATE)
+
+
+@query_shape("refresh_tokens.by_user")
+def _refresh_tokens_by_user():
+    return RefreshToken.objects(user=SAMPLE_ID)
+
+
+@query_shape("event_booking_stats.by_events")
+def _event_booking_stats_by_events():
+    return EventBookingStats.objects(event__in=[SAMPLE_ID])
+
+
+@query_shape("daily_booking_stats.by_events")
+def _daily_booking_stats_by_events():
+    return DailyBookingStats.objects(event__in=[SAMPLE_ID], day__gte=SAMPLE_DATE, day__lte=SAMPLE_DATE)
+
+
+@query_shape("booking_tickets.next_queued")
+def _booking_tickets_next_queued():
+    return BookingTicket.objects(status="queued").order_by("created_at")
+
+
+@query_shape("booking_tickets.stale_processing")
+def _booking_tickets_stale_processing():
+    stale = Q(claimed_at__lt=SAMPLE_DATE) | Q(claimed_at__exists=False)
+    return BookingTicket.objects(Q(status="processing") & stale)
+
+
+@query_shape("request_profiles.by_id")
+def _request_profiles_by_id():
+    return RequestProfile.objects(profile_id="sample")
+
+
+@query_shape("request_profiles.recent")
+def _request_profiles_recent():
+    return RequestProfile.objects.order_by("-created_at")
+
+
+def _plan_stages(plan):
+    """Yields every stage name found anywhere in an explain() plan."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _plan_stages(value)
+
+
+def audit_query_shapes():
+    """
+    Explains every registered query shape and returns
+    [(name, stages, problems)], where problems lists collection scans and
+    in-memory sorts.
+    """
+    results = []
+    for name, build in QUERY_SHAPES.items():
+        explain = build().explain()
+        stages = list(_plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {})))
+        problems = []
+        if "COLLSCAN" in stages:
+            problems.append("COLLSCAN")
+        if "SORT" in stages:
+            problems.append("in-memory SORT")
+        results.append((name, stages, problems))
+    return results
+
+
+def audit_declared_indexes():
+    """Returns [(collection, missing, extra)] comparing meta indexes to Mongo."""
+    results = []
+    for model in MODELS:
+        diff = model.compare_indexes()
+        results.append((model._get_collection_name(), diff["missing"], diff["extra"]))
+    return results
@@ -0,0 +1,35 @@
+from werkzeug.utils import cached_property, import_string
+
+
+class LazyView:
+    """
+    A view function given by its import path and imported on its first
+    request (Flask's "lazily loading views" pattern), so registering a
+    blueprint doesn't import its controller module and what that pulls in.
+    """
+
+    def __init__(self, import_name):
+        self.import_name = import_name
+        # Endpoint names stay those of the controller functions
+        self.__module__, self.__name__ = import_name.rsplit(".", 1)
+
+    @cached_property
+    def view(self):
+        return import_string(self.import_name)
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+
+def lazy_views(module_name):
+    """Returns view(name), the LazyView of `name` in `module_name`."""
+    def view(name):
+        return LazyView(f"{module_name}.{name}")
+    return view
+
+
+def resolve_views(app):
+    """Imports every lazy view now, e.g. before a pre-forking server forks."""
+    for view_func in app.view_functions.values():
+        if isinstance(view_func, LazyView):
+            view_func.view
@@ -0,0 +1,244 @@
+import os
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from flask import request, current_app, g
+from pymongo import monitoring
+from app.utils.mongo_pool import register_listener
+
+# Upper bounds of the histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # seconds
+COMMAND_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)  # bytes
+
+# Mongo activity of the request being served on this thread
+_current = ContextVar("request_mongo_stats", default=None)
+
+# One listener per process, like mongo_pool's PoolMonitor
+_listener = None
+
+
+class RequestStats:
+    __slots__ = ("commands", "seconds", "shapes")
+
+    def __init__(self):
+        self.commands = 0
+        self.seconds = 0.0
+        self.shapes = Counter()  # (command, collection) -> times run
+
+
+class CommandListener(monitoring.CommandListener):
+    """Adds every Mongo command to the stats of the request that ran it."""
+
+    def __init__(self):
+        self.registry = None
+
+    def started(self, event):
+        stats = _current.get()
+        if stats is None:
+            return
+        stats.commands += 1
+        collection = event.command.get(event.command_name)
+        stats.shapes[(event.command_name, collection if isinstance(collection, str) else "")] += 1
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+    def _finished(self, event):
+        seconds = event.duration_micros / 1e6
+        stats = _current.get()
+        if stats is not None:
+            stats.seconds += seconds
+        if self.registry is not None:
+            self.registry.observe("mongo_command_duration_seconds", {"command": event.command_name},
+                                  seconds, LATENCY_BUCKETS)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms of this process, rendered in the Prometheus text
+    format. Every worker process keeps its own numbers; scrape each one.
+    """
+
+    HELP = {
+        "http_request_duration_seconds": ("histogram", "Request latency by route"),
+        "http_response_size_bytes": ("histogram", "Response body size by route"),
+        "http_request_mongo_commands": ("histogram", "Mongo commands run per request"),
+        "http_request_mongo_seconds": ("histogram", "Time spent in Mongo commands per request"),
+        "http_requests_over_query_threshold_total": ("counter", "Requests that ran more than "
+                                                                "METRICS_QUERY_THRESHOLD Mongo commands"),
+        "mongo_command_duration_seconds": ("histogram", "Mongo command latency by command")
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            histograms = sorted(
+                (key, (list(h.counts), h.total, h.count, h.buckets)) for key, h in self._histograms.items()
+            )
+            counters = sorted(self._counters.items())
+
+        lines = []
+        declared = set()
+
+        def declare(name):
+            if name not in declared:
+                declared.add(name)
+                kind, text = self.HELP.get(name, ("untyped", name))
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), (counts, total, count, buckets) in histograms:
+            declare(name)
+            cumulative = 0
+            for bound, n in zip(buckets, counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_labels(labels, le=_number(bound))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels, le='+Inf')} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        for (name, labels), value in counters:
+            declare(name)
+            lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _route():
+    # The URL rule, not the path, so /api/event/<event_id> is one series
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    _current.set(RequestStats())
+
+
+def _finish_request(response):
+    stats = _current.get()
+    if stats is None or "metrics_started" not in g:
+        return response
+
+    app = current_app._get_current_object()
+    registry = app.extensions["metrics"]
+    labels = {"method": request.method, "route": _route()}
+    started = g.pop("metrics_started")
+
+    if app.config["METRICS_QUERY_HEADERS"]:
+        # So far; a streamed body may still run more
+        response.headers["X-Mongo-Commands"] = str(stats.commands)
+
+    def record():
+        elapsed = time.perf_counter() - started
+        _current.set(None)
+        registry.observe("http_request_duration_seconds", dict(labels, status=response.status_code),
+                         elapsed, LATENCY_BUCKETS)
+        registry.observe("http_request_mongo_commands", labels, stats.commands, COMMAND_COUNT_BUCKETS)
+        registry.observe("http_request_mongo_seconds", labels, stats.seconds, LATENCY_BUCKETS)
+        size = response.calculate_content_length()
+        if size is not None:
+            registry.observe("http_response_size_bytes", labels, size, SIZE_BUCKETS)
+
+        if stats.commands > app.config["METRICS_QUERY_THRESHOLD"]:
+            # Usually a query per row (N+1); name the command that repeats most
+            registry.increment("http_requests_over_query_threshold_total", labels)
+            (command, collection), times = stats.shapes.most_common(1)[0]
+            app.logger.warning(
+                "%s %s ran %d Mongo commands in %.1f ms (%s on %s %d times)",
+                labels["method"], labels["route"], stats.commands, stats.seconds * 1000,
+                command, collection or "-", times
+            )
+
+    # Recorded once the body is sent, so streamed responses count in full
+    response.call_on_close(record)
+    return response
+
+
+def metrics_view():
+    token = current_app.config["METRICS_TOKEN"]
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return current_app.response_class("Unauthorized\n", status=401, mimetype="text/plain")
+    body = current_app.extensions["metrics"].render()
+    return current_app.response_class(body, mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+def init_metrics(app):
+    """
+    Times every request, counts the Mongo commands it runs and serves the
+    results on GET /metrics. Registers a command listener, so call before
+    db.init_app().
+    """
+    global _listener
+    if not app.config["METRICS_ENABLED"]:
+        return
+
+    if _listener is None:
+        _listener = CommandListener()
+    registry = MetricsRegistry()
+    # The newest app's registry also gets the per-command latencies
+    _listener.registry = registry
+    register_listener(app, _listener)
+
+    app.extensions["metrics"] = registry
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
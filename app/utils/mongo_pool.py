@@ -0,0 +1,166 @@
+import os
+import threading
+from flask import current_app
+from pymongo import monitoring
+from pymongo.read_preferences import Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest
+}
+
+# MONGODB_SETTINGS keys that are for flask-mongoengine/mongoengine, not the driver
+NON_DRIVER_SETTINGS = {"host", "db", "alias", "port", "connect", "mongo_client_class", "is_mock"}
+
+# One monitor per process: mongoengine refuses to re-register a connection
+# whose settings (listeners included) changed, e.g. on a second create_app()
+_monitor = None
+
+
+def register_listener(app, listener):
+    """
+    Adds a pymongo event listener to MONGODB_SETTINGS; call before
+    db.init_app(). Pass the same instance on every create_app() call.
+    """
+    settings = dict(app.config["MONGODB_SETTINGS"])
+    listeners = list(settings.get("event_listeners", []))
+    if listener not in listeners:
+        listeners.append(listener)
+    settings["event_listeners"] = listeners
+    app.config["MONGODB_SETTINGS"] = settings
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Counts connection pool events of this process, per server. The counters
+    start from zero in every forked worker, like the driver's pools do.
+    """
+
+    def __init__(self, max_pool_size):
+        self.max_pool_size = max_pool_size
+        self.reset()
+        os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self):
+        # A fresh lock too: the parent's may have been held while forking
+        self._lock = threading.Lock()
+        self._servers = {}
+
+    def _server(self, address):
+        address = "%s:%s" % address
+        server = self._servers.get(address)
+        if server is None:
+            server = self._servers[address] = {
+                "open": 0, "checked_out": 0, "peak_checked_out": 0, "checkouts": 0,
+                "checkout_failures": {}, "wait_seconds": 0.0, "pool_clears": 0
+            }
+        return server
+
+    def connection_created(self, event):
+        with self._lock:
+            self._server(event.address)["open"] += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._server(event.address)["open"] -= 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server["checkouts"] += 1
+            server["checked_out"] += 1
+            server["peak_checked_out"] = max(server["peak_checked_out"], server["checked_out"])
+            # How long the request waited for a connection (PyMongo 4.9+)
+            server["wait_seconds"] += getattr(event, "duration", 0) or 0
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            failures = self._server(event.address)["checkout_failures"]
+            failures[event.reason] = failures.get(event.reason, 0) + 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._server(event.address)["checked_out"] -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._server(event.address)["pool_clears"] += 1
+
+    # The remaining events carry nothing worth counting
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def stats(self):
+        with self._lock:
+            servers = {}
+            for address, server in self._servers.items():
+                checkouts = server["checkouts"]
+                servers[address] = {
+                    "open": server["open"],
+                    "checked_out": server["checked_out"],
+                    "peak_checked_out": server["peak_checked_out"],
+                    "utilization": round(server["checked_out"] / self.max_pool_size, 3) if self.max_pool_size else None,
+                    "checkouts": checkouts,
+                    "checkout_failures": dict(server["checkout_failures"]),
+                    "avg_wait_ms": round(server["wait_seconds"] * 1000 / checkouts, 3) if checkouts else 0.0,
+                    "pool_clears": server["pool_clears"]
+                }
+        return {"pid": os.getpid(), "max_pool_size": self.max_pool_size, "servers": servers}
+
+
+def client_options(settings):
+    """The driver options of MONGODB_SETTINGS, e.g. for a second client."""
+    return {key: value for key, value in settings.items()
+            if key.lower() not in NON_DRIVER_SETTINGS and value is not None}
+
+
+def read_preference(name, max_staleness=-1):
+    if name not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference {name!r}")
+    if name == "primary":
+        return Primary()
+    return READ_PREFERENCES[name](max_staleness=max_staleness)
+
+
+def init_mongo_pool(app):
+    """
+    Adds the pool monitor to MONGODB_SETTINGS; call before db.init_app().
+    The client itself is created with connect=False, so it opens no
+    connection until the first query, i.e. in the worker after any fork.
+    """
+    global _monitor
+    settings = app.config["MONGODB_SETTINGS"]
+    # pymongo's own default when maxPoolSize isn't set
+    max_pool_size = next((value for key, value in settings.items() if key.lower() == "maxpoolsize"), 100)
+    if _monitor is None:
+        _monitor = PoolMonitor(max_pool_size)
+    register_listener(app, _monitor)
+
+    app.extensions["mongo_pool"] = _monitor
+    app.extensions["browse_read_preference"] = read_preference(
+        app.config["MONGODB_BROWSE_READ_PREFERENCE"], app.config["MONGODB_BROWSE_MAX_STALENESS"]
+    )
+
+
+def browse_reads(queryset):
+    """
+    Routes a read-only browsing query (event listing and detail) with
+    MONGODB_BROWSE_READ_PREFERENCE, e.g. to secondaries. Only for reads
+    that can be a few seconds stale; everything else stays on the primary.
+    """
+    return queryset.read_preference(current_app.extensions["browse_read_preference"])
@@ -0,0 +1,162 @@
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import request, current_app
+from mongoengine.queryset.visitor import Q
+
+
+class PaginationError(Exception):
+    """Raised for a malformed limit or cursor query parameter."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def encode_cursor(value, object_id):
+    if isinstance(value, datetime):
+        value = {"$date": value.isoformat()}
+    payload = json.dumps({"v": value, "id": str(object_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = payload["v"]
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["$date"])
+        return value, ObjectId(payload["id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise PaginationError("Invalid cursor")
+
+
+def encode_offset_cursor(offset, last_id):
+    """Cursor for results ranked by relevance or distance, which have no seek key."""
+    return encode_cursor(offset, last_id)
+
+
+def decode_offset_cursor(token):
+    offset, _ = decode_cursor(token)
+    if not isinstance(offset, int) or offset < 0:
+        raise PaginationError("Invalid cursor")
+    return offset
+
+
+def read_field(item, field):
+    # Works for Documents as well as raw dicts from as_pymongo()
+    if isinstance(item, dict):
+        return item["_id" if field == "id" else field]
+    return getattr(item, field)
+
+
+def cursor_for(item, sort_field=None):
+    """The cursor of the page that starts right after `item`."""
+    return encode_cursor(read_field(item, sort_field) if sort_field else None, read_field(item, "id"))
+
+
+def after_cursor(queryset, sort_field, descending, value, last_id):
+    """Narrows `queryset` to the rows after (value, last_id) in keyset order."""
+    op = "lt" if descending else "gt"
+    if not sort_field:
+        return queryset.filter(**{f"id__{op}": last_id})
+    return queryset.filter(
+        Q(**{f"{sort_field}__{op}": value}) |
+        Q(**{sort_field: value, f"id__{op}": last_id})
+    )
+
+
+def keyset_order(sort_field, descending):
+    sign = "-" if descending else "+"
+    return [f"{sign}{sort_field}", f"{sign}id"] if sort_field else [f"{sign}id"]
+
+
+def keyset_filter(sort_field, descending, value, last_id):
+    """after_cursor() as a raw Mongo filter, for use without MongoEngine."""
+    op = "$lt" if descending else "$gt"
+    if not sort_field:
+        return {"_id": {op: last_id}}
+    return {"$or": [{sort_field: {op: value}}, {sort_field: value, "_id": {op: last_id}}]}
+
+
+def keyset_sort(sort_field, descending):
+    """keyset_order() as a raw Mongo sort."""
+    direction = -1 if descending else 1
+    return [(sort_field, direction), ("_id", direction)] if sort_field else [("_id", direction)]
+
+
+def page_limit():
+    return parse_limit(request.args.get("limit"), current_app.config)
+
+
+def parse_limit(limit, config):
+    """The page size asked for (None = default), capped at PAGE_SIZE_MAX."""
+    if limit is None:
+        limit = config["PAGE_SIZE_DEFAULT"]
+    maximum = config["PAGE_SIZE_MAX"]
+    try:
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError
+    except (ValueError, TypeError):
+        raise PaginationError("limit should be a positive number")
+    return min(limit, maximum)
+
+
+def paginate(queryset, sort_field=None, descending=True):
+    """
+    Keyset pagination over (sort_field, _id), or over _id alone when no
+    sort field is given. Reads `limit`, `cursor` and `count` from the query
+    string and returns (items, page) where `page` holds the opaque
+    `next_cursor` (None on the last page) and, with ?count=estimate, a
+    count capped at PAGINATION_COUNT_CAP.
+
+    Every page is a single index range scan, however deep the client pages.
+    """
+    limit = page_limit()
+    page = {}
+
+    # The count is taken before the cursor narrows the queryset
+    if request.args.get("count") == "estimate":
+        cap = current_app.config["PAGINATION_COUNT_CAP"]
+        total = queryset.limit(cap).count(with_limit_and_skip=True)
+        page["estimated_total"] = total
+        page["total_is_capped"] = total >= cap
+
+    token = request.args.get("cursor")
+    if token:
+        queryset = after_cursor(queryset, sort_field, descending, *decode_cursor(token))
+
+    items = list(queryset.order_by(*keyset_order(sort_field, descending)).limit(limit + 1))
+
+    page["next_cursor"] = None
+    if len(items) > limit:
+        items = items[:limit]
+        page["next_cursor"] = cursor_for(items[-1], sort_field)
+
+    return items, page
+
+
+def paginate_ranked(queryset):
+    """
+    Offset pagination for a queryset already ordered by relevance or
+    distance. Returns (items, page) like paginate(). Pages stop after
+    RANKED_RESULTS_MAX results, which bounds how far Mongo has to skip.
+    """
+    limit = page_limit()
+    token = request.args.get("cursor")
+    offset = decode_offset_cursor(token) if token else 0
+
+    maximum = current_app.config["RANKED_RESULTS_MAX"]
+    limit = max(0, min(limit, maximum - offset))
+    items = list(queryset.skip(offset).limit(limit + 1)) if limit else []
+
+    page = {"next_cursor": None}
+    if len(items) > limit:
+        items = items[:limit]
+        page["next_cursor"] = encode_offset_cursor(offset + limit, read_field(items[-1], "id"))
+    return items, page
@@ -0,0 +1,92 @@
+import os
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+import bcrypt
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when too many hash jobs are already waiting for the pool, or a
+    job took longer than PASSWORD_HASH_TIMEOUT.
+    """
+
+
+def _encode(password):
+    # bcrypt only looks at the first 72 bytes; newer releases refuse longer input
+    return password.encode("utf-8")[:72]
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+
+def _check(hashed, password):
+    return bcrypt.checkpw(_encode(password), hashed.encode("utf-8"))
+
+
+def hash_cost(hashed):
+    """The work factor of a "$2b$12$..." hash, or None if it can't be read."""
+    try:
+        return int(hashed.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a bounded process pool so login storms can't pin every
+    request thread on CPU work. At most PASSWORD_HASH_MAX_PENDING jobs may
+    be running or waiting; beyond that callers get PasswordHasherBusy
+    instead of queueing indefinitely.
+    """
+
+    def __init__(self, app):
+        self.rounds = app.config["BCRYPT_LOG_ROUNDS"]
+        self._workers = app.config["PASSWORD_HASH_WORKERS"] or os.cpu_count()
+        self._timeout = app.config["PASSWORD_HASH_TIMEOUT"]
+        self._slots = threading.BoundedSemaphore(app.config["PASSWORD_HASH_MAX_PENDING"])
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.rounds)
+
+    def verify(self, hashed, password):
+        return self._run(_check, hashed, password)
+
+    def needs_rehash(self, hashed):
+        return hash_cost(hashed) != self.rounds
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the job is done, even once we stop waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self._timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise PasswordHasherBusy()
+
+    def _get_executor(self):
+        # Created on first use, i.e. in the serving process after any fork
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # multiprocessing is slow to import; leave it out of startup
+                    import multiprocessing
+                    from concurrent.futures import ProcessPoolExecutor
+                    # Forking a threaded process that holds a Mongo client can
+                    # deadlock the child; start the workers from a clean process
+                    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                    self._executor = ProcessPoolExecutor(self._workers, mp_context=multiprocessing.get_context(method))
+        return self._executor
+
+
+def init_password_hasher(app):
+    app.extensions["password_hasher"] = PasswordHasher(app)
@@ -0,0 +1,38 @@
+import os
+
+
+def make_derivatives(path, sizes, image_format, quality):
+    """
+    Writes a resized, re-encoded copy of the image at `path` for every
+    {variant: max_side} in `sizes`, next to the original. Images are only
+    ever scaled down. Returns {variant: derivative_path}, or None when the
+    file is not an image Pillow can read (or Pillow is not installed).
+    """
+    try:
+        from PIL import Image, UnidentifiedImageError
+    except ImportError:
+        return None
+
+    derivatives = {}
+    try:
+        with Image.open(path) as image:
+            image.load()
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+            base, _ = os.path.splitext(path)
+            for variant, max_side in sizes.items():
+                copy = image.copy()
+                copy.thumbnail((max_side, max_side))
+                if image_format == "JPEG" and copy.mode == "RGBA":
+                    copy = copy.convert("RGB")
+                target = f"{base}_{variant}.{image_format.lower()}"
+                derivatives[variant] = target
+                copy.save(target, image_format, quality=quality, optimize=True)
+            return derivatives
+    # DecompressionBombError: more pixels than Image.MAX_IMAGE_PIXELS allows
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        for target in derivatives.values():
+            if os.path.exists(target):
+                os.remove(target)
+        return None
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from mongoengine.errors import NotUniqueError
+from werkzeug.utils import secure_filename
+from app.models.event_model import Event
+from app.models.poster_asset_model import PosterAsset
+from app.utils.poster_images import make_derivatives
+from app.utils.storage import create_storage
+from app.utils.response_cache import invalidate_event
+
+POSTER_FOLDER = "event_posters"
+
+
+class PosterUploader:
+    """
+    Moves poster uploads off the request path. The request only spools the
+    poster to local disk and marks the event "pending"; a bounded thread
+    pool then turns it into resized derivatives, sends them to the storage
+    backend, retrying with exponential backoff, and fills in
+    Event.poster_url/poster_variants when done.
+
+    Posters are content-addressed: bytes already processed once (e.g. the
+    same poster for a recurring event) reuse the stored derivatives.
+    """
+
+    def __init__(self, app):
+        self._app = app
+        self._storage = None
+        self._spool_dir = app.config["POSTER_SPOOL_DIR"]
+        self._workers = app.config["POSTER_UPLOAD_WORKERS"]
+        self._retries = app.config["POSTER_UPLOAD_RETRIES"]
+        self._backoff = app.config["POSTER_UPLOAD_BACKOFF"]
+        self._variants = app.config["POSTER_VARIANTS"]
+        self._variant_format = app.config["POSTER_VARIANT_FORMAT"]
+        self._variant_quality = app.config["POSTER_VARIANT_QUALITY"]
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def spool(self, poster):
+        """
+        Streams an uploaded file to a uniquely named file in the spool
+        directory, hashing it on the way, and returns
+        (upload_id, path, sha256).
+        """
+        os.makedirs(self._spool_dir, exist_ok=True)
+        upload_id = uuid.uuid4().hex
+        path = os.path.join(self._spool_dir, f"{upload_id}_{secure_filename(poster.filename or 'poster')}")
+        digest = hashlib.sha256()
+        with open(path, "wb") as target:
+            for chunk in iter(lambda: poster.stream.read(64 * 1024), b""):
+                digest.update(chunk)
+                target.write(chunk)
+        return upload_id, path, digest.hexdigest()
+
+    def discard(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    def submit(self, event_id, upload_id, path, sha256):
+        self._get_executor().submit(self._upload, event_id, upload_id, path, sha256)
+
+    def _get_executor(self):
+        # Created on first use, i.e. in the serving process after any fork
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix="poster-upload")
+        return self._executor
+
+    def _get_storage(self):
+        # Created by the first upload, so its client isn't set up at startup
+        if self._storage is None:
+            with self._lock:
+                if self._storage is None:
+                    self._storage = create_storage(self._app)
+        return self._storage
+
+    def _upload(self, event_id, upload_id, path, sha256):
+        with self._app.app_context():
+            try:
+                variants = self._variants_for(path, sha256)
+                update = {
+                    "set__poster_status": "ready",
+                    "set__poster_url": variants["full"],
+                    "set__poster_variants": variants
+                } if variants else {"set__poster_status": "failed"}
+                # Only the latest upload of an event may set its poster
+                Event.objects(id=event_id, poster_upload_id=upload_id).update_one(**update)
+                invalidate_event(event_id)
+            except Exception:
+                # Nobody reads the future, so this is the only trace of the failure
+                self._app.logger.exception("Poster upload %s of event %s failed", upload_id, event_id)
+                self._mark_failed(event_id, upload_id)
+            finally:
+                self.discard(path)
+
+    def _mark_failed(self, event_id, upload_id):
+        try:
+            Event.objects(id=event_id, poster_upload_id=upload_id).update_one(set__poster_status="failed")
+            invalidate_event(event_id)
+        except Exception:
+            self._app.logger.exception("Marking the poster of event %s failed", event_id)
+
+    def _variants_for(self, path, sha256):
+        """
+        Returns {variant: url} for the poster at `path`, generating and
+        storing the derivatives unless these bytes were processed before.
+        Returns None if storing fails after all retries.
+        """
+        asset = PosterAsset.objects(sha256=sha256).first()
+        if asset:
+            return asset.variants
+
+        derivatives = make_derivatives(path, self._variants, self._variant_format, self._variant_quality)
+        if derivatives is None:
+            # Not an image Pillow can read: keep the original as the only variant
+            derivatives = {"full": path}
+
+        try:
+            variants = {}
+            for variant, file_path in derivatives.items():
+                url = self._store(file_path, f"{sha256}_{variant}{os.path.splitext(file_path)[1]}")
+                if url is None:
+                    return None
+                variants[variant] = url
+        finally:
+            for file_path in derivatives.values():
+                if file_path != path:
+                    self.discard(file_path)
+
+        try:
+            PosterAsset(sha256=sha256, variants=variants).save(force_insert=True)
+        except NotUniqueError:
+            # Another worker stored the same poster meanwhile
+            pass
+        return variants
+
+    def _store(self, path, name):
+        for attempt in range(self._retries + 1):
+            try:
+                return self._get_storage().save(path, POSTER_FOLDER, name)
+            except Exception:
+                self._app.logger.exception("Poster upload %s failed (attempt %d)", name, attempt + 1)
+                if attempt < self._retries:
+                    time.sleep(self._backoff * 2 ** attempt)
+        return None
+
+
+def init_poster_uploads(app):
+    app.extensions["poster_uploader"] = PosterUploader(app)
@@ -0,0 +1,305 @@
+import importlib
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+from flask import request, current_app, g
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from app.models.request_profile_model import RequestProfile
+from app.utils.auth_utils import current_role_version
+
+REQUEST_ID_HEADER = "X-Request-ID"
+PROFILE_HEADER = "X-Profile"
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+MAX_DEPTH = 128
+
+
+class Profile:
+    """Stack samples of one request, counted by collapsed stack."""
+
+    def __init__(self, request_id, method, path, max_samples):
+        self.profile_id = uuid.uuid4().hex
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.max_samples = max_samples
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = time.perf_counter()
+        # The sampler thread may still be adding while the request finishes
+        self._lock = threading.Lock()
+
+    def add(self, stack):
+        with self._lock:
+            self.stacks[stack] += 1
+            self.samples += 1
+            return self.samples < self.max_samples
+
+    def collapsed(self, max_bytes):
+        """
+        "frame;frame;frame count" lines, root first, as flamegraph.pl and
+        speedscope read them. The most frequent stacks are kept when the
+        profile is over `max_bytes`; returns (text, truncated, samples).
+        """
+        with self._lock:
+            stacks, samples = self.stacks.most_common(), self.samples
+        lines, size = [], 0
+        for stack, count in stacks:
+            line = f"{stack} {count}"
+            size += len(line) + 1
+            if size > max_bytes:
+                return "\n".join(lines), True, samples
+            lines.append(line)
+        return "\n".join(lines), False, samples
+
+
+class Sampler:
+    """
+    One daemon thread per process that walks the stacks of the threads
+    serving profiled requests every `interval` seconds. It only runs while
+    a request is being profiled and sleeps longer when walking the stacks
+    would take more than `max_overhead` of the time.
+    """
+
+    def __init__(self, interval, max_overhead):
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.reset()
+        os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self):
+        self._active = {}  # thread ident -> Profile
+        self._labels = {}  # code object -> "module:function"
+        self._wakeup = threading.Condition()
+        self._thread = None
+
+    @property
+    def active(self):
+        return len(self._active)
+
+    def start(self, profile):
+        with self._wakeup:
+            self._active[threading.get_ident()] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+            self._wakeup.notify()
+
+    def stop(self, profile):
+        with self._wakeup:
+            for ident, active in list(self._active.items()):
+                if active is profile:
+                    del self._active[ident]
+
+    def _label(self, code, frame):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{frame.f_globals.get('__name__', '?')}:{code.co_name}"
+        return label
+
+    def _collapse(self, frame):
+        labels = []
+        while frame is not None and len(labels) < MAX_DEPTH:
+            labels.append(self._label(frame.f_code, frame))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._active:
+                    self._wakeup.wait()
+                active = list(self._active.items())
+
+            started = time.perf_counter()
+            frames = sys._current_frames()
+            for ident, profile in active:
+                frame = frames.get(ident)
+                if frame is not None and not profile.add(self._collapse(frame)):
+                    # Enough samples; the request goes on unprofiled
+                    self.stop(profile)
+            del frames
+            cost = time.perf_counter() - started
+            time.sleep(max(self.interval, cost / self.max_overhead - cost))
+
+
+class MemoryProfileStore:
+    """
+    Keeps the newest profiles in this process, within a count and a byte
+    budget. Good for single-process servers; a profile can only be fetched
+    from the worker that recorded it.
+    """
+
+    def __init__(self, max_profiles, max_bytes):
+        self._profiles = OrderedDict()
+        self._bytes = 0
+        self._max_profiles = max_profiles
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def save(self, profile):
+        profile = dict(profile, created_at=datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
+        with self._lock:
+            self._profiles[profile["profile_id"]] = profile
+            self._bytes += len(profile["stacks"])
+            while self._profiles and (len(self._profiles) > self._max_profiles or self._bytes > self._max_bytes):
+                _, oldest = self._profiles.popitem(last=False)
+                self._bytes -= len(oldest["stacks"])
+
+    def get(self, profile_id):
+        with self._lock:
+            profile = self._profiles.get(profile_id)
+            return dict(profile) if profile else None
+
+    def recent(self, limit):
+        with self._lock:
+            profiles = list(self._profiles.values())[-limit:]
+        return [{k: v for k, v in p.items() if k != "stacks"} for p in reversed(profiles)]
+
+
+class MongoProfileStore:
+    """
+    Stores profiles in the request_profiles collection, shared by every
+    server process. Beyond max_profiles the oldest ones are deleted.
+    """
+
+    def __init__(self, max_profiles, max_bytes):
+        self._max_profiles = max_profiles
+
+    def save(self, profile):
+        RequestProfile(**profile).save(force_insert=True)
+        stale = RequestProfile.objects.order_by("-created_at").skip(self._max_profiles).only("profile_id")
+        ids = [doc["_id"] for doc in stale.limit(100).as_pymongo()]
+        if ids:
+            RequestProfile.objects(__raw__={"_id": {"$in": ids}}).delete()
+
+    def get(self, profile_id):
+        profile = RequestProfile.objects(profile_id=profile_id).first()
+        return profile.to_profile() if profile else None
+
+    def recent(self, limit):
+        profiles = RequestProfile.objects.order_by("-created_at").exclude("stacks").limit(limit)
+        return [{k: v for k, v in p.to_profile().items() if k != "stacks"} for p in profiles]
+
+
+BACKENDS = {
+    "memory": MemoryProfileStore,
+    "mongo": MongoProfileStore
+}
+
+
+def _load_backend(name):
+    if name in BACKENDS:
+        return BACKENDS[name]
+    # Anything else is a "package.module:ClassName" path
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class RequestProfiler:
+    def __init__(self, app):
+        config = app.config
+        self.sample_rate = config["PROFILER_SAMPLE_RATE"]
+        self.max_concurrent = config["PROFILER_MAX_CONCURRENT"]
+        self.max_profile_bytes = config["PROFILER_MAX_PROFILE_BYTES"]
+        interval = config["PROFILER_INTERVAL_MS"] / 1000
+        self.max_samples = max(1, int(config["PROFILER_MAX_SECONDS"] / interval))
+        self.sampler = Sampler(interval, config["PROFILER_MAX_OVERHEAD"])
+        backend_class = _load_backend(config["PROFILER_STORE"])
+        self.store = backend_class(config["PROFILER_MAX_PROFILES"], config["PROFILER_MAX_STORE_BYTES"])
+        # finish() runs after the request context is gone
+        self.logger = app.logger
+
+    def wanted(self):
+        """Whether to profile this request: an admin asked, or it was sampled."""
+        if self.sampler.active >= self.max_concurrent:
+            return False
+        if request.headers.get(PROFILE_HEADER):
+            return _is_admin()
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self, request_id):
+        profile = Profile(request_id, request.method, request.path, self.max_samples)
+        self.sampler.start(profile)
+        return profile
+
+    def finish(self, profile, status):
+        self.sampler.stop(profile)
+        try:
+            self._save(profile, status)
+        except Exception:
+            self.logger.exception("Saving the profile of request %s failed", profile.request_id)
+
+    def _save(self, profile, status):
+        stacks, truncated, samples = profile.collapsed(self.max_profile_bytes)
+        self.store.save({
+            "profile_id": profile.profile_id,
+            "request_id": profile.request_id,
+            "method": profile.method,
+            "path": profile.path,
+            "status": status,
+            "duration_ms": round((time.perf_counter() - profile.started) * 1000, 3),
+            "samples": samples,
+            "interval_ms": self.sampler.interval * 1000,
+            "truncated": truncated,
+            "stacks": stacks
+        })
+
+
+def _is_admin():
+    # Like admin_required, but a failed check just means "don't profile"
+    try:
+        verify_jwt_in_request(optional=True)
+        claims = get_jwt()
+    except Exception:
+        return False
+    return claims.get("role") == "admin" and current_role_version(claims["sub"]) == claims.get("rv", 0)
+
+
+def _start_request():
+    incoming = request.headers.get(REQUEST_ID_HEADER, "")
+    g.request_id = incoming if _REQUEST_ID.match(incoming) else uuid.uuid4().hex
+
+    profiler = current_app.extensions["profiler"]
+    if profiler.wanted():
+        g.profile = profiler.start(g.request_id)
+
+
+def _finish_request(response):
+    response.headers[REQUEST_ID_HEADER] = g.get("request_id", "")
+    profile = g.pop("profile", None)
+    if profile is None:
+        return response
+
+    profiler = current_app.extensions["profiler"]
+    response.headers["X-Profile-Id"] = profile.profile_id
+    # Once the body is sent, so streamed responses are profiled in full
+    response.call_on_close(lambda: profiler.finish(profile, response.status_code))
+    return response
+
+
+def _abandon_profile(error):
+    # Requests that never reached after_request
+    profile = g.pop("profile", None)
+    if profile is not None:
+        current_app.extensions["profiler"].sampler.stop(profile)
+
+
+def init_profiler(app):
+    """
+    Opt-in stack sampling of live requests. A request is profiled when an
+    admin sends an X-Profile header, or at random with PROFILER_SAMPLE_RATE;
+    the profile is stored under the id in its X-Profile-Id header and
+    served by the admin profile endpoints.
+    """
+    if not app.config["PROFILER_ENABLED"]:
+        return
+    app.extensions["profiler"] = RequestProfiler(app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_abandon_profile)
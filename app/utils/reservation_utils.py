@@ -0,0 +1,245 @@
+from mongoengine.context_managers import no_dereference
+from mongoengine.errors import NotUniqueError, ValidationError
+import random
+from datetime import datetime
+from app.models.event_model import Event, SeatShard
+from app.models.booking_model import Booking
+from app.utils.response_cache import invalidate_event
+from app.utils.booking_stats import record_booking, record_cancellation, discard_booking
+
+
+class ReservationError(Exception):
+    """Raised when a seat cannot be reserved or released."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _take_seat(event_id):
+    """
+    Atomically decrements the seat counter of an event, but only while seats
+    are left. Returns the updated event, or None when nothing was taken.
+    """
+    # A raw $inc, since the field's min_value would reject a -1 operand
+    return Event.objects(id=event_id, seats_available__gt=0).modify(
+        __raw__={"$inc": {"seats_available": -1}}, new=True
+    )
+
+
+def _take_shard_seat(event):
+    """
+    Takes a seat from one of the event's shards. A random shard is tried
+    first; if it is empty, the shards that still have seats are looked up
+    and tried in random order.
+    """
+    shard = random.randrange(event.seat_shards)
+    if SeatShard.objects(event=event.id, shard=shard, seats__gt=0).update_one(
+            __raw__={"$inc": {"seats": -1}}):
+        return True
+
+    remaining = list(SeatShard.objects(event=event.id, seats__gt=0).scalar("shard"))
+    random.shuffle(remaining)
+    for shard in remaining:
+        if SeatShard.objects(event=event.id, shard=shard, seats__gt=0).update_one(
+                __raw__={"$inc": {"seats": -1}}):
+            return True
+    return False
+
+
+def _give_back_seat(event_id):
+    _return_seat(event_id)
+    # After the seat is back, so a read in between can't cache the old count
+    invalidate_event(event_id)
+
+
+def _return_seat(event_id):
+    # Unsharded events (seat_shards 0 or missing) take the seat back directly
+    if Event.objects(id=event_id, seat_shards__not__gt=0).update_one(inc__seats_available=1):
+        return
+
+    event = Event.objects(id=event_id).only("seat_shards").first()
+    if event and event.seat_shards:
+        shard = random.randrange(event.seat_shards)
+        if SeatShard.objects(event=event_id, shard=shard).update_one(inc__seats=1):
+            return
+
+    # The event was unsharded in the meantime
+    Event.objects(id=event_id).update_one(inc__seats_available=1)
+
+
+def reserve_seat(user, event_id):
+    """
+    Books one seat of `event_id` for `user`.
+
+    The seat is taken with a single conditional `$inc` so concurrent requests
+    can never oversell, and the unique (customer, event) index on bookings
+    rejects duplicates. If the booking insert fails the seat is handed back.
+    """
+    try:
+        event = _take_seat(event_id)
+    except ValidationError:
+        raise ReservationError("Event not found", 404)
+
+    if event is None:
+        # Sharded events keep no seats on the Event document, so they always
+        # land here; only this path pays for a second lookup.
+        event = Event.objects(id=event_id).first()
+        if not event:
+            raise ReservationError("Event not found", 404)
+        if not event.seat_shards or not _take_shard_seat(event):
+            raise ReservationError("Event is fully booked", 400)
+
+    booking = Booking(customer=user, event=event)
+    try:
+        booking.save(force_insert=True)
+    except NotUniqueError:
+        _give_back_seat(event.id)
+        raise ReservationError("You already booked this event", 400)
+    except Exception:
+        _give_back_seat(event.id)
+        raise
+
+    record_booking(event.id, booking.booked_at)
+    invalidate_event(event.id)
+    return booking
+
+
+def release_seat(customer, booking_id):
+    """
+    Cancels a booking owned by `customer` (a User or its id) and returns
+    its seat to the event.
+
+    The booking is removed with a single find-and-delete, so two concurrent
+    cancellations of the same booking can only give the seat back once.
+    """
+    try:
+        booking = Booking.objects(id=booking_id, customer=customer).modify(remove=True)
+    except ValidationError:
+        booking = None
+
+    if booking is None:
+        raise ReservationError("Booking not found or not yours", 404)
+
+    with no_dereference(Booking):
+        event_id = booking.event.id
+
+    _give_back_seat(event_id)
+    record_cancellation(event_id)
+    return booking
+
+
+def reserve_seats(user, event_ids):
+    """
+    Books one seat of each event in `event_ids` for `user`, all or nothing.
+
+    Seats are taken one event at a time with reserve_seat(). At the first
+    failure the bookings already made are rolled back (deleted, seats given
+    back) and the rest are not attempted. Returns (ok, results) with one
+    result per event, in order.
+    """
+    results = []
+    bookings = []
+    failed = False
+
+    for event_id in event_ids:
+        if failed:
+            results.append({"event_id": event_id, "status": "not_attempted"})
+            continue
+        try:
+            booking = reserve_seat(user, event_id)
+        except ReservationError as e:
+            failed = True
+            results.append({"event_id": event_id, "status": "failed", "error": e.message})
+            continue
+        bookings.append(booking)
+        results.append({"event_id": event_id, "status": "booked", "booking_id": str(booking.id)})
+
+    if failed:
+        for booking, result in zip(bookings, results):
+            _undo_reservation(booking)
+            result["status"] = "rolled_back"
+            del result["booking_id"]
+
+    return not failed, results
+
+
+def _undo_reservation(booking):
+    # Unlike release_seat() this isn't a cancellation: the booking never stood
+    if not Booking.objects(id=booking.id).delete():
+        return
+    with no_dereference(Booking):
+        event_id = booking.event.id
+    _give_back_seat(event_id)
+    discard_booking(event_id, booking.booked_at)
+
+
+def shard_event_seats(event_id, shards):
+    """
+    Moves an event's remaining seats into `shards` SeatShard counters.
+    The Event document is flipped to sharded mode atomically, so no seat can
+    be taken from both the document and a shard.
+    """
+    event = Event.objects(id=event_id, seat_shards__not__gt=0).modify(
+        set__seats_available=0, set__seat_shards=shards
+    )
+    if event is None:
+        raise ReservationError("Event not found or already sharded", 400)
+
+    seats = event.seats_available
+    SeatShard.objects.insert([
+        SeatShard(event=event.id, shard=i, seats=seats // shards + (1 if i < seats % shards else 0))
+        for i in range(shards)
+    ], load_bulk=False)
+    invalidate_event(event.id)
+    return seats
+
+
+def unshard_event_seats(event_id):
+    """
+    Folds every seat shard of an event back into Event.seats_available.
+    """
+    event = Event.objects(id=event_id, seat_shards__gt=0).modify(set__seat_shards=0)
+    if event is None:
+        raise ReservationError("Event not found or not sharded", 400)
+
+    seats = 0
+    for shard in range(event.seat_shards):
+        removed = SeatShard.objects(event=event.id, shard=shard).modify(remove=True)
+        if removed:
+            seats += removed.seats
+    Event.objects(id=event.id).update_one(inc__seats_available=seats)
+    invalidate_event(event.id)
+    return seats
+
+
+def dedupe_bookings():
+    """
+    Deletes all but the first booking of every (customer, event) pair and
+    gives their seats back, so the unique index of Booking can be built on
+    data from before it existed. Reads the collection directly, as touching
+    Booking would first try to build that index. Returns the number of
+    bookings deleted.
+    """
+    bookings = Booking._get_db()[Booking._get_collection_name()]
+    duplicates = bookings.aggregate([
+        {"$sort": {"_id": 1}},
+        {"$group": {
+            "_id": {"customer": "$customer", "event": "$event"},
+            "bookings": {"$push": {"id": "$_id", "booked_at": "$booked_at"}},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True)
+
+    deleted = 0
+    for group in duplicates:
+        event_id = group["_id"]["event"]
+        for booking in group["bookings"][1:]:
+            # Only the run that deleted a booking gives its seat back
+            if bookings.delete_one({"_id": booking["id"]}).deleted_count:
+                _give_back_seat(event_id)
+                discard_booking(event_id, booking.get("booked_at") or datetime.utcnow())
+                deleted += 1
+    return deleted
@@ -0,0 +1,166 @@
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, make_response
+
+
+class MemoryCacheBackend:
+    """
+    LRU cache with a per-entry TTL and tag-based invalidation, local to the
+    current process. Other processes only see an invalidation once their own
+    copy expires, so multi-process deployments that need precise
+    invalidation should plug in a shared backend with the same methods.
+    """
+
+    def __init__(self, max_entries):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}  # tag -> set of keys
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def set(self, key, value, ttl, tags):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self._max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.get(tag, set()).copy():
+                    self._remove(key)
+                    self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), max_entries=self._max_entries)
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+BACKENDS = {
+    "memory": MemoryCacheBackend
+}
+
+
+def _load_backend(name):
+    if name in BACKENDS:
+        return BACKENDS[name]
+    # Anything else is a "package.module:ClassName" path
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def init_response_cache(app):
+    if not app.config["RESPONSE_CACHE_ENABLED"]:
+        return
+    backend_class = _load_backend(app.config["RESPONSE_CACHE_BACKEND"])
+    app.extensions["response_cache"] = backend_class(app.config["RESPONSE_CACHE_MAX_ENTRIES"])
+
+
+def cached_response(key_fn, tags_fn):
+    """
+    Caches successful JSON responses of a view. `key_fn(*args, **kwargs)`
+    builds the cache key from the request; `tags_fn(payload, *args, **kwargs)`
+    lists the tags the response depends on, which invalidate_tags() uses to
+    drop it when the underlying data changes.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get("response_cache")
+            if cache is None:
+                return fn(*args, **kwargs)
+
+            key = key_fn(*args, **kwargs)
+            body = cache.get(key)
+            if body is not None:
+                response = current_app.response_class(body, status=200, mimetype="application/json")
+                response.headers["X-Cache"] = "HIT"
+                return response
+
+            response = make_response(fn(*args, **kwargs))
+            if response.status_code == 200:
+                tags = tags_fn(response.get_json(), *args, **kwargs)
+                cache.set(key, response.get_data(), current_app.config["RESPONSE_CACHE_TTL"], tags)
+            response.headers["X-Cache"] = "MISS"
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate_tags(tags):
+    cache = current_app.extensions.get("response_cache")
+    if cache is not None:
+        cache.invalidate_tags(tags)
+
+
+def event_tag(event_id):
+    return f"event:{event_id}"
+
+
+def scope_tag(country_key=None, city_key=None):
+    """Tag of event listings filtered on this country/city (None = any)."""
+    return f"events:scope:{country_key or '*'}:{city_key or '*'}"
+
+
+def invalidate_event(event_id, locations=()):
+    """
+    Drops cached responses showing `event_id`. For every (country_key,
+    city_key) in `locations` the listings that could start or stop showing
+    the event there are dropped as well; pass the old and new location on
+    create, update and delete. Seat changes only need the event itself.
+    """
+    invalidate_tags({event_tag(event_id)} | _location_tags(locations))
+
+
+def invalidate_locations(locations):
+    """Drops the listings of (country_key, city_key) pairs, e.g. after an import."""
+    invalidate_tags(_location_tags(locations))
+
+
+def _location_tags(locations):
+    tags = set()
+    for country_key, city_key in locations:
+        tags.update({
+            scope_tag(),
+            scope_tag(country_key),
+            scope_tag(None, city_key),
+            scope_tag(country_key, city_key)
+        })
+    return tags
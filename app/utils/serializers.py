@@ -0,0 +1,179 @@
+from flask import current_app, jsonify
+from app.models.event_model import Event
+from app.models.user_model import User
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def minutes(value):
+    """Same text as value.strftime("%Y-%m-%d %H:%M"), without strftime's cost."""
+    if value is None:
+        return None
+    return value.replace(tzinfo=None).isoformat(" ", "minutes")
+
+
+def _text(value):
+    return str(value) if value is not None else None
+
+
+class RowSerializer:
+    """
+    Turns raw documents from `.only(*serializer.fields).as_pymongo()` into
+    response rows without building Documents. The spec maps each output key
+    to (stored field, converter) and is resolved once, at import time, so
+    serializing a row is a single pass over a precomputed list.
+    """
+
+    def __init__(self, spec):
+        self._getters = []
+        fields = []
+        for key, (field, convert) in spec.items():
+            stored = "_id" if field == "id" else field
+            fields.append(field)
+            self._getters.append((key, stored, convert))
+        self.columns = tuple(spec)
+        self.fields = tuple(dict.fromkeys(fields))
+
+    def __call__(self, doc):
+        row = {}
+        for key, stored, convert in self._getters:
+            value = doc.get(stored)
+            row[key] = convert(value) if convert else value
+        return row
+
+
+# Same shape as Event.to_json(); seats_available is filled in by event_rows()
+EVENT_ROW = RowSerializer({
+    "id": ("id", str),
+    "title": ("title", None),
+    "description": ("description", None),
+    "seats_available": ("seats_available", None),
+    "date": ("date", minutes),
+    "poster_url": ("poster_url", None),
+    "poster_status": ("poster_status", None),
+    "poster_variants": ("poster_variants", lambda variants: variants or None),
+    "country": ("country", None),
+    "city": ("city", None),
+    "location": ("location", None),
+    "organizer": ("organizer", _text)
+})
+
+# Admin event listings
+EVENT_SUMMARY_ROW = RowSerializer({
+    "id": ("id", str),
+    "title": ("title", None),
+    "organizer": ("organizer", _text),
+    "date": ("date", minutes),
+    "city": ("city", None),
+    "country": ("country", None),
+    "seats_available": ("seats_available", None)
+})
+
+# Admin user listings: User.to_json() plus created_at. Users have no
+# created_at field; the ObjectId carries the creation time
+USER_ADMIN_ROW = RowSerializer({
+    "id": ("id", str),
+    "name": ("name", None),
+    "email": ("email", None),
+    "role": ("role", None),
+    "created_at": ("id", lambda object_id: minutes(object_id.generation_time))
+})
+
+
+def event_query_fields(serializer):
+    # seat_shards tells event_rows() which events need their shards summed
+    return serializer.fields + ("seat_shards",)
+
+
+# Same shape as get_event_by_id(); seats and organizer come from event_detail()
+EVENT_DETAIL_ROW = RowSerializer({
+    "id": ("id", str),
+    "title": ("title", None),
+    "description": ("description", None),
+    "date": ("date", lambda value: value.isoformat() if value else None),
+    "city": ("city", None),
+    "country": ("country", None),
+    "location": ("location", None),
+    "seats_available": ("seats_available", None),
+    "poster_url": ("poster_url", None),
+    "poster_status": ("poster_status", None),
+    "poster_variants": ("poster_variants", lambda variants: variants or None),
+    "organizer_id": ("organizer", _text)
+})
+
+
+def sharded_ids(docs):
+    """Ids of the sharded events among raw event documents."""
+    return [doc["_id"] for doc in docs if doc.get("seat_shards")]
+
+
+def event_rows(docs, serializer=EVENT_ROW, seats=None):
+    """
+    Serializes raw event documents fetched with event_query_fields(serializer),
+    summing the seat shards of sharded events in one aggregation. Callers
+    that already summed them (e.g. with another driver) pass `seats`.
+    """
+    if seats is None:
+        seats = Event.sum_seat_shards(sharded_ids(docs))
+    rows = []
+    for doc in docs:
+        row = serializer(doc)
+        if doc["_id"] in seats:
+            row["seats_available"] = seats[doc["_id"]]
+        rows.append(row)
+    return rows
+
+
+def event_detail(doc, organizer, seats):
+    """
+    The get_event_by_id() payload of a raw event document, given its
+    organizer's raw user document (or None) and its reconciled seats.
+    """
+    row = EVENT_DETAIL_ROW(doc)
+    row["seats_available"] = seats
+    row["organizer_name"] = organizer.get("name") if organizer else None
+    return row
+
+
+def booking_row(doc, customer, event):
+    """
+    Same shape as Booking.to_json() for a raw booking document, given its
+    customer's raw user document and its event's EVENT_ROW row.
+    """
+    return {
+        "id": str(doc["_id"]),
+        "customer": {
+            "id": str(customer["_id"]),
+            "name": customer.get("name"),
+            "email": customer.get("email")
+        } if customer else None,
+        "event": event,
+        "booked_at": minutes(doc.get("booked_at"))
+    }
+
+
+def users_by_id(user_ids):
+    """Name and email of every user in `user_ids`, with a single query."""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return {}
+    return {
+        user["_id"]: user
+        for user in User.objects(id__in=user_ids).only("name", "email").as_pymongo()
+    }
+
+
+def json_response(payload, status=200):
+    """
+    A JSON response like jsonify() builds, encoded with orjson when it is
+    installed. Keys are sorted and a newline appended, as jsonify does.
+    """
+    if orjson is None:
+        response = jsonify(payload)
+        response.status_code = status
+        return response
+    body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return current_app.response_class(body, status=status, mimetype="application/json")
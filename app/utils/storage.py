@@ -0,0 +1,52 @@
+import importlib
+import os
+import shutil
+
+
+class CloudinaryStorage:
+    """Uploads files to Cloudinary. The SDK is only imported on first use."""
+
+    def __init__(self, app):
+        pass
+
+    def save(self, local_path, folder, name):
+        from app.config.cloudinary_config import cloudinary
+        # Cloudinary streams the file from disk in chunks
+        result = cloudinary.uploader.upload(local_path, folder=folder, public_id=os.path.splitext(name)[0])
+        return result.get("secure_url")
+
+
+class LocalStorage:
+    """
+    Copies files into POSTER_STORAGE_DIR and serves them under
+    POSTER_STORAGE_URL. A stand-in for Cloudinary in tests and benchmarks.
+    """
+
+    def __init__(self, app):
+        self._root = app.config["POSTER_STORAGE_DIR"]
+        self._base_url = app.config["POSTER_STORAGE_URL"].rstrip("/")
+
+    def save(self, local_path, folder, name):
+        target_dir = os.path.join(self._root, folder)
+        os.makedirs(target_dir, exist_ok=True)
+        with open(local_path, "rb") as source, open(os.path.join(target_dir, name), "wb") as target:
+            shutil.copyfileobj(source, target)
+        return f"{self._base_url}/{folder}/{name}"
+
+
+BACKENDS = {
+    "cloudinary": CloudinaryStorage,
+    "local": LocalStorage
+}
+
+
+def _load_backend(name):
+    if name in BACKENDS:
+        return BACKENDS[name]
+    # Anything else is a "package.module:ClassName" path
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_storage(app):
+    return _load_backend(app.config["POSTER_STORAGE_BACKEND"])(app)
@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from flask_jwt_extended import decode_token
+from app.models.refresh_token_model import RefreshToken
+
+
+class RevokedTokenCache:
+    """
+    Remembers JTIs that were rotated, logged out or never found, until the
+    token would have expired anyway. Replayed tokens are then refused
+    without a database round trip. The database stays authoritative; this
+    only short-cuts the negative answers this process has already seen.
+    """
+
+    def __init__(self, max_entries=100000):
+        self._entries = OrderedDict()  # jti -> expires_at (epoch seconds)
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._entries[jti] = expires_at
+            self._entries.move_to_end(jti)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, jti):
+        with self._lock:
+            expires_at = self._entries.get(jti)
+            if expires_at is None:
+                return False
+            if expires_at < time.time():
+                del self._entries[jti]
+                return False
+            return True
+
+
+revoked_tokens = RevokedTokenCache()
+
+
+def store_refresh_token(encoded_token, user_id, role_claims):
+    """
+    Saves a freshly issued refresh token, keyed by its JTI, together with
+    the role claims (see auth_utils.role_claims) its rotation will issue.
+    """
+    claims = decode_token(encoded_token)
+    RefreshToken(
+        jti=claims["jti"],
+        user=user_id,
+        role=role_claims["role"],
+        role_version=role_claims["rv"],
+        expires_at=datetime.utcfromtimestamp(claims["exp"])
+    ).save(force_insert=True)
+
+
+def consume_refresh_token(claims):
+    """
+    Removes the refresh token with the given decoded claims in a single
+    atomic find-and-delete and returns its row, or None if it was already
+    used, revoked or expired. A token can therefore only be rotated once.
+    """
+    jti = claims["jti"]
+    if jti in revoked_tokens:
+        return None
+
+    entry = RefreshToken.objects(
+        jti=jti, user=claims["sub"], expires_at__gt=datetime.utcnow()
+    ).modify(remove=True)
+    revoked_tokens.add(jti, claims["exp"])
+    return entry
+
+
+def revoke_refresh_token(encoded_token):
+    """Deletes a refresh token given its encoded form; bad tokens are ignored."""
+    try:
+        claims = decode_token(encoded_token, allow_expired=True)
+    except Exception:
+        return
+    RefreshToken.objects(jti=claims["jti"]).delete()
+    revoked_tokens.add(claims["jti"], claims["exp"])
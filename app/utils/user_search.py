@@ -0,0 +1,75 @@
+import re
+from flask import request, current_app
+from app.models.user_model import User
+from app.utils.pagination import encode_offset_cursor, decode_offset_cursor, page_limit
+from app.utils.serializers import USER_ADMIN_ROW
+
+
+def _rank(user, query):
+    # Lower is better: exact email, exact name, name prefix, email prefix, any word
+    name = User.normalize(user.get("name"))
+    email = User.normalize(user.get("email"))
+    if email == query:
+        return 0
+    if name == query:
+        return 1
+    if name.startswith(query):
+        return 2
+    if email.startswith(query):
+        return 3
+    return 4
+
+
+def _prefix(word):
+    return {"search_tokens": re.compile("^" + re.escape(word))}
+
+
+def _conditions(query):
+    """
+    One condition per whitespace-separated part of `query`: it prefixes a
+    token as a whole (an email, its local part or domain), or each of its
+    User.search_words does, as they were split when the tokens were stored.
+    """
+    conditions = []
+    for part in query.split():
+        words = User.search_words(part)
+        if not words:
+            continue
+        if words == [part]:
+            conditions.append(_prefix(part))
+        else:
+            conditions.append({"$or": [_prefix(part), {"$and": [_prefix(word) for word in words]}]})
+    return conditions
+
+
+def ranked_user_search(query):
+    """
+    Finds users whose search_tokens start with every word of `query` and
+    returns (items, page) like paginate(). Matching is an index range scan
+    per word; at most USER_SEARCH_CANDIDATES matches are ranked, and
+    page["truncated"] tells the caller that a more specific query would
+    find more. Reads `limit` and `cursor` from the query string.
+    """
+    limit = page_limit()
+    token = request.args.get("cursor")
+    offset = decode_offset_cursor(token) if token else 0
+
+    query = User.normalize(query)
+    conditions = _conditions(query)
+    if not conditions:
+        # Nothing searchable left, e.g. only punctuation or accents
+        return [], {"next_cursor": None, "truncated": False}
+    candidates = current_app.config["USER_SEARCH_CANDIDATES"]
+
+    users = list(
+        User.objects(__raw__={"$and": conditions})
+        .only(*USER_ADMIN_ROW.fields).as_pymongo().limit(candidates + 1)
+    )
+    truncated = len(users) > candidates
+    users = sorted(users[:candidates], key=lambda user: (_rank(user, query), user.get("name") or "", user["_id"]))
+
+    items = users[offset:offset + limit]
+    page = {"next_cursor": None, "truncated": truncated}
+    if offset + limit < len(users):
+        page["next_cursor"] = encode_offset_cursor(offset + limit, items[-1]["_id"])
+    return items, page
@@ -0,0 +1,3 @@
+from app.async_app import create_async_app
+
+app = create_async_app()
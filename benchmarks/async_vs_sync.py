@@ -0,0 +1,63 @@
+"""
+Compares how the sync (Flask) and async (Quart, asgi.py) read paths scale
+with concurrent connections. Start both against the same database, e.g.
+
+    gunicorn -w 4 --threads 8 -b :5000 run:app
+    hypercorn -w 4 -b :8000 asgi:app
+
+then run
+
+    python benchmarks/async_vs_sync.py --sync http://localhost:5000 --async http://localhost:8000
+
+For each concurrency level both servers get the same request mix; the
+table shows throughput and latency percentiles side by side. Pass a
+logged-in user's cookie with --cookie to include authenticated routes.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from http_load import run_load  # noqa: E402
+
+PUBLIC_PATHS = ["/api/event/filter?limit=50", "/api/event/filter?limit=50&country=pakistan"]
+CUSTOMER_PATHS = ["/api/booking/my?limit=50"]
+VENDOR_PATHS = ["/api/event/my-events?limit=50"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sync", required=True, help="Base URL of the Flask app")
+    parser.add_argument("--async", dest="async_", required=True, help="Base URL of the async app")
+    parser.add_argument("--concurrency", default="1,8,32,128,256",
+                        help="Comma-separated numbers of concurrent connections")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per level and server")
+    parser.add_argument("--event-id", action="append", default=[], help="Also read this event (repeatable)")
+    parser.add_argument("--cookie", help="Cookie header of a logged-in user")
+    parser.add_argument("--role", choices=("customer", "vendor"), help="Role of the --cookie user")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    paths = PUBLIC_PATHS + [f"/api/event/{event_id}" for event_id in args.event_id]
+    headers = {}
+    if args.cookie:
+        headers["Cookie"] = args.cookie
+        paths += CUSTOMER_PATHS if args.role == "customer" else VENDOR_PATHS if args.role == "vendor" else []
+
+    results = []
+    print(f"{'conns':>6} {'server':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for concurrency in (int(level) for level in args.concurrency.split(",")):
+        for name, url in (("sync", args.sync), ("async", args.async_)):
+            stats = run_load(url, paths, concurrency, args.duration, headers)
+            results.append({"server": name, "concurrency": concurrency, **stats})
+            print(f"{concurrency:>6} {name:>6} {stats['rps']:>9} {stats['p50_ms']!s:>8} "
+                  f"{stats['p95_ms']!s:>8} {stats['p99_ms']!s:>8} {stats['errors']:>7}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"paths": paths, "duration": args.duration, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+A small closed-loop HTTP load generator: `concurrency` clients, each on
+its own keep-alive connection, send requests back to back for `duration`
+seconds. Standard library only, so it runs wherever the app does.
+"""
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Set by the app when METRICS_QUERY_HEADERS is on
+COMMANDS_HEADER = "X-Mongo-Commands"
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed, commands=None):
+    """
+    Throughput and latency percentiles (milliseconds) of one run, plus the
+    mean Mongo commands per request when the server reported them.
+    """
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": _ms(percentile(latencies, 0.50)),
+        "p95_ms": _ms(percentile(latencies, 0.95)),
+        "p99_ms": _ms(percentile(latencies, 0.99)),
+        "max_ms": _ms(latencies[-1] if latencies else None),
+        "queries_per_request": round(sum(commands) / len(commands), 2) if commands else None
+    }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+class PathClient:
+    """Cycles through GETs of `paths`; the client of run_load()."""
+
+    def __init__(self, paths, offset, headers=None):
+        self.paths = paths
+        self.i = offset
+        self.headers = headers or {}
+
+    def next_request(self):
+        path = self.paths[self.i % len(self.paths)]
+        self.i += 1
+        return "GET", path, None, self.headers
+
+    def on_response(self, status, headers, body):
+        pass
+
+
+def run_clients(base_url, clients, duration):
+    """
+    Runs one thread per client for `duration` seconds and returns
+    summarize() of the run. A client's next_request() returns
+    (method, path, body, headers), or None once it has nothing left to
+    send; on_response(status, headers, body) sees every answer. Any
+    non-2xx answer or connection failure counts as an error.
+    """
+    parts = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    prefix = parts.path.rstrip("/")
+
+    latencies = []
+    commands = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def run(client):
+        connection = connection_class(parts.netloc, timeout=30)
+        mine, counts, failed = [], [], 0
+        while time.perf_counter() < deadline:
+            request = client.next_request()
+            if request is None:
+                break
+            method, path, body, headers = request
+            started = time.perf_counter()
+            try:
+                connection.request(method, prefix + path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+                elapsed = time.perf_counter() - started
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = connection_class(parts.netloc, timeout=30)
+                continue
+
+            client.on_response(response.status, response.headers, data)
+            if 200 <= response.status < 300:
+                mine.append(elapsed)
+                count = response.headers.get(COMMANDS_HEADER)
+                if count is not None:
+                    counts.append(int(count))
+            else:
+                failed += 1
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+            commands.extend(counts)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=run, args=(client,), daemon=True) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started, commands)
+
+
+def run_load(base_url, paths, concurrency, duration, headers=None):
+    """
+    Hammers `base_url` with GETs of `paths` (cycled) from `concurrency`
+    clients for `duration` seconds and returns summarize() of the run.
+    """
+    clients = [PathClient(paths, n, headers) for n in range(concurrency)]
+    return run_clients(base_url, clients, duration)
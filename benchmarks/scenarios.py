@@ -0,0 +1,400 @@
+"""
+One scenario per route of auth_bp, event_bp, booking_bp and admin_bp, in
+the order benchmarks/suite.py runs them: reads first, then writes, then
+the scenarios that delete data. A scenario turns the BenchContext into
+one client per concurrent connection (see http_load.run_clients()).
+"""
+import json
+import random
+import uuid
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+from bson import ObjectId
+
+from seed import CITIES, FIRST_NAMES, KINDS, PASSWORD, customer_email
+
+SCENARIOS = []
+
+
+class Scenario:
+    def __init__(self, name, blueprint, make_clients, consumes=False):
+        self.name = name
+        self.blueprint = blueprint
+        self.make_clients = make_clients
+        # Uses up prepared data, so it is never warmed up
+        self.consumes = consumes
+
+
+def scenario(name, blueprint, consumes=False):
+    def register(fn):
+        SCENARIOS.append(Scenario(name, blueprint, fn, consumes))
+        return fn
+    return register
+
+
+class Session:
+    """The JWT cookies of one logged-in user."""
+
+    def __init__(self, user_id, email, cookies):
+        self.user_id = user_id
+        self.email = email
+        self.cookies = cookies
+
+    def cookie_header(self, names=None):
+        return "; ".join(f"{name}={value}" for name, value in self.cookies.items()
+                         if names is None or name in names)
+
+    def update(self, headers):
+        # Refresh rotates both tokens
+        for header in headers.get_all("Set-Cookie") or []:
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+
+
+class Client:
+    """
+    One simulated user. `build(client)` returns the next request as
+    (method, path, body, content_type), or None when there is nothing left
+    to send; `items` is the client's own share of prepared data.
+    """
+
+    def __init__(self, build, rng, session=None, items=None, cookies=None, rotate_cookies=False):
+        self.build = build
+        self.rng = rng
+        self.session = session
+        self.items = list(items or [])
+        self.cookies = cookies
+        self.rotate_cookies = rotate_cookies
+
+    def take(self):
+        return self.items.pop() if self.items else None
+
+    def next_request(self):
+        request = self.build(self)
+        if request is None:
+            return None
+        method, path, body, content_type = request
+        headers = {}
+        if self.session is not None:
+            headers["Cookie"] = self.session.cookie_header(self.cookies)
+        if body is not None:
+            if not isinstance(body, (str, bytes)):
+                body = json.dumps(body)
+            headers["Content-Type"] = content_type or "application/json"
+        return method, path, body, headers
+
+    def on_response(self, status, headers, body):
+        if self.rotate_cookies and status == 200:
+            self.session.update(headers)
+
+
+def _clients(ctx, concurrency, build, sessions=None, items=None, **kwargs):
+    """`concurrency` clients, round-robin over `sessions`, splitting `items`."""
+    clients = []
+    for n in range(concurrency):
+        session = sessions[n % len(sessions)] if sessions else None
+        share = items[n::concurrency] if items is not None else None
+        clients.append(Client(build, random.Random(ctx.seed + n), session, share, **kwargs))
+    return clients
+
+
+def _get(path):
+    return lambda client: ("GET", path, None, None)
+
+
+def _random_event(client, ctx):
+    return client.rng.choice(ctx.event_ids)
+
+
+def _event_form(client, title_prefix="Bench"):
+    country, city, latitude, longitude = client.rng.choice(CITIES)
+    date = datetime(2027, 1, 1) + timedelta(hours=client.rng.randrange(24 * 365))
+    return {
+        "title": f"{title_prefix} {client.rng.choice(KINDS)} {uuid.uuid4().hex[:8]}",
+        "description": "Created by the benchmark suite",
+        "date": date.strftime("%Y-%m-%d %H:%M"),
+        "country": country,
+        "city": city,
+        "location": "Bench Hall",
+        "seats_available": str(client.rng.randint(100, 1000)),
+        "latitude": str(latitude),
+        "longitude": str(longitude)
+    }
+
+
+# --- auth_bp ---
+
+@scenario("auth.me", "auth_bp")
+def _auth_me(ctx, concurrency):
+    return _clients(ctx, concurrency, _get("/api/auth/me"), ctx.customers)
+
+
+@scenario("auth.login", "auth_bp")
+def _auth_login(ctx, concurrency):
+    def build(client):
+        email = customer_email(client.rng.randrange(ctx.customer_count))
+        return "POST", "/api/auth/login", {"email": email, "password": PASSWORD}, None
+    return _clients(ctx, concurrency, build)
+
+
+@scenario("auth.refresh", "auth_bp")
+def _auth_refresh(ctx, concurrency):
+    # Refresh tokens are single use, so every client rotates its own session
+    sessions = ctx.login_many([customer_email(i) for i in ctx.spare_customer_indexes(concurrency)])
+    return [
+        Client(lambda client: ("POST", "/api/auth/refresh", None, None), random.Random(ctx.seed + n),
+               session, rotate_cookies=True)
+        for n, session in enumerate(sessions)
+    ]
+
+
+@scenario("auth.register", "auth_bp")
+def _auth_register(ctx, concurrency):
+    def build(client):
+        email = f"bench-{uuid.uuid4().hex}@bench.example"
+        return "POST", "/api/auth/register", {
+            "name": f"{client.rng.choice(FIRST_NAMES)} Bench", "email": email,
+            "password": PASSWORD, "role": "customer"
+        }, None
+    return _clients(ctx, concurrency, build)
+
+
+@scenario("auth.logout", "auth_bp")
+def _auth_logout(ctx, concurrency):
+    # Without the refresh cookie, so the shared sessions stay usable
+    return _clients(ctx, concurrency, lambda client: ("POST", "/api/auth/logout", None, None),
+                    ctx.customers, cookies={"access_token_cookie"})
+
+
+# --- event_bp ---
+
+@scenario("event.filter", "event_bp")
+def _event_filter(ctx, concurrency):
+    return _clients(ctx, concurrency, _get("/api/event/filter?limit=50"))
+
+
+@scenario("event.filter_location", "event_bp")
+def _event_filter_location(ctx, concurrency):
+    def build(client):
+        country, city, _, _ = client.rng.choice(CITIES)
+        return "GET", "/api/event/filter?" + urlencode({"country": country, "city": city, "limit": 50}), None, None
+    return _clients(ctx, concurrency, build)
+
+
+@scenario("event.filter_dates", "event_bp")
+def _event_filter_dates(ctx, concurrency):
+    def build(client):
+        start = datetime(2026, 1, 1) + timedelta(days=client.rng.randrange(900))
+        end = start + timedelta(days=30)
+        query = {
+            "start_year": start.year, "start_month": start.month, "start_day": start.day,
+            "end_year": end.year, "end_month": end.month, "end_day": end.day, "limit": 50
+        }
+        return "GET", "/api/event/filter?" + urlencode(query), None, None
+    return _clients(ctx, concurrency, build)
+
+
+@scenario("event.search_text", "event_bp")
+def _event_search_text(ctx, concurrency):
+    def build(client):
+        return "GET", "/api/event/filter?" + urlencode({"q": client.rng.choice(KINDS), "limit": 20}), None, None
+    return _clients(ctx, concurrency, build)
+
+
+@scenario("event.near", "event_bp")
+def _event_near(ctx, concurrency):
+    def build(client):
+        _, _, latitude, longitude = client.rng.choice(CITIES)
+        query = {"lat": latitude, "lng": longitude, "radius_km": 10, "limit": 20}
+        return "GET", "/api/event/filter?" + urlencode(query), None, None
+    return _clients(ctx, concurrency, build)
+
+
+@scenario("event.by_id", "event_bp")
+def _event_by_id(ctx, concurrency):
+    return _clients(ctx, concurrency, lambda client: ("GET", f"/api/event/{_random_event(client, ctx)}", None, None))
+
+
+@scenario("event.my_events", "event_bp")
+def _event_my_events(ctx, concurrency):
+    return _clients(ctx, concurrency, _get("/api/event/my-events?limit=50"), ctx.vendors)
+
+
+@scenario("event.analytics", "event_bp")
+def _event_analytics(ctx, concurrency):
+    return _clients(ctx, concurrency, _get("/api/event/analytics"), ctx.vendors)
+
+
+@scenario("event.create", "event_bp")
+def _event_create(ctx, concurrency):
+    def build(client):
+        return "POST", "/api/event/create", urlencode(_event_form(client)), "application/x-www-form-urlencoded"
+    return _clients(ctx, concurrency, build, ctx.vendors)
+
+
+@scenario("event.import", "event_bp")
+def _event_import(ctx, concurrency):
+    def build(client):
+        return "POST", "/api/event/import", {"events": [_event_form(client, "Imported") for _ in range(25)]}, None
+    return _clients(ctx, concurrency, build, ctx.vendors)
+
+
+@scenario("event.update", "event_bp")
+def _event_update(ctx, concurrency):
+    # Vendors only update their own events; one client per vendor session
+    def build(client):
+        event_id = client.rng.choice(client.items)
+        return "PUT", f"/api/event/{event_id}", urlencode({"title": f"Updated {uuid.uuid4().hex[:8]}"}), \
+            "application/x-www-form-urlencoded"
+    return [Client(build, random.Random(ctx.seed + n), session, ctx.vendor_events[session.user_id])
+            for n, session in enumerate(ctx.vendors) if ctx.vendor_events[session.user_id]]
+
+
+# --- booking_bp ---
+
+@scenario("booking.my", "booking_bp")
+def _booking_my(ctx, concurrency):
+    return _clients(ctx, concurrency, _get("/api/booking/my?limit=50"), ctx.customers)
+
+
+@scenario("booking.event_bookings", "booking_bp")
+def _booking_event_bookings(ctx, concurrency):
+    def build(client):
+        return "GET", f"/api/booking/event/{client.rng.choice(client.items)}?limit=50", None, None
+    return [Client(build, random.Random(ctx.seed + n), session, ctx.vendor_events[session.user_id])
+            for n, session in enumerate(ctx.vendors) if ctx.vendor_events[session.user_id]]
+
+
+@scenario("booking.export", "booking_bp")
+def _booking_export(ctx, concurrency):
+    def build(client):
+        return "GET", f"/api/booking/event/{client.rng.choice(client.items)}/export", None, None
+    return [Client(build, random.Random(ctx.seed + n), session, ctx.vendor_events[session.user_id])
+            for n, session in enumerate(ctx.vendors) if ctx.vendor_events[session.user_id]]
+
+
+@scenario("booking.book", "booking_bp", consumes=True)
+def _booking_book(ctx, concurrency):
+    # Every client books events it hasn't booked yet, so no request is a duplicate
+    def build(client):
+        event_id = client.take()
+        return ("POST", f"/api/booking/{event_id}", None, None) if event_id else None
+    return _clients(ctx, concurrency, build, ctx.customers, items=ctx.unbooked_events(concurrency))
+
+
+@scenario("booking.group", "booking_bp", consumes=True)
+def _booking_group(ctx, concurrency):
+    def build(client):
+        event_ids = [client.take() for _ in range(3)]
+        if not all(event_ids):
+            return None
+        return "POST", "/api/booking/group", {"event_ids": event_ids}, None
+    return _clients(ctx, concurrency, build, ctx.customers, items=ctx.unbooked_events(concurrency))
+
+
+@scenario("booking.ticket", "booking_bp")
+def _booking_ticket(ctx, concurrency):
+    # Tickets only exist with BOOKING_QUEUE_ENABLED; skipped otherwise
+    ticket_id = ctx.queue_ticket()
+    if ticket_id is None:
+        return []
+    return _clients(ctx, concurrency, _get(f"/api/booking/ticket/{ticket_id}"), ctx.customers[:1])
+
+
+@scenario("booking.cancel", "booking_bp", consumes=True)
+def _booking_cancel(ctx, concurrency):
+    def build(client):
+        booking_id = client.take()
+        return ("DELETE", f"/api/booking/cancel/{booking_id}", None, None) if booking_id else None
+    return [Client(build, random.Random(ctx.seed + n), session, ctx.customer_bookings(session.user_id))
+            for n, session in enumerate(ctx.customers)]
+
+
+# --- admin_bp ---
+
+@scenario("admin.users", "admin_bp")
+def _admin_users(ctx, concurrency):
+    return _clients(ctx, concurrency, _get("/api/admin/users?limit=50"), ctx.admins)
+
+
+@scenario("admin.users_search", "admin_bp")
+def _admin_users_search(ctx, concurrency):
+    def build(client):
+        return "GET", "/api/admin/users/search?" + urlencode({"q": client.rng.choice(FIRST_NAMES)[:3]}), None, None
+    return _clients(ctx, concurrency, build, ctx.admins)
+
+
+@scenario("admin.users_filter", "admin_bp")
+def _admin_users_filter(ctx, concurrency):
+    return _clients(ctx, concurrency, _get("/api/admin/users/filter?role=vendor&limit=50"), ctx.admins)
+
+
+@scenario("admin.events", "admin_bp")
+def _admin_events(ctx, concurrency):
+    return _clients(ctx, concurrency, _get("/api/admin/events?limit=50"), ctx.admins)
+
+
+@scenario("admin.events_filter", "admin_bp")
+def _admin_events_filter(ctx, concurrency):
+    def build(client):
+        country, city, _, _ = client.rng.choice(CITIES)
+        query = urlencode({"country": country, "city": city, "limit": 50})
+        return "GET", f"/api/admin/admin/events/filter?{query}", None, None
+    return _clients(ctx, concurrency, build, ctx.admins)
+
+
+@scenario("admin.cache_stats", "admin_bp")
+def _admin_cache_stats(ctx, concurrency):
+    return _clients(ctx, concurrency, _get("/api/admin/cache/stats"), ctx.admins)
+
+
+@scenario("admin.db_pool", "admin_bp")
+def _admin_db_pool(ctx, concurrency):
+    return _clients(ctx, concurrency, _get("/api/admin/db/pool"), ctx.admins)
+
+
+@scenario("admin.users_export", "admin_bp")
+def _admin_users_export(ctx, concurrency):
+    return _clients(ctx, concurrency, _get("/api/admin/users/export"), ctx.admins)
+
+
+@scenario("admin.events_export", "admin_bp")
+def _admin_events_export(ctx, concurrency):
+    return _clients(ctx, concurrency, _get("/api/admin/events/export"), ctx.admins)
+
+
+@scenario("admin.user_role", "admin_bp")
+def _admin_user_role(ctx, concurrency):
+    # Users nobody is logged in as, so no session loses its role claim
+    def build(client):
+        return "POST", f"/api/admin/user/{client.rng.choice(client.items)}/role", {"role": "customer"}, None
+    users = [str(user_id) for user_id in ctx.idle_customer_ids(1000)]
+    return [Client(build, random.Random(ctx.seed + n), ctx.admins[0], users) for n in range(concurrency)]
+
+
+@scenario("event.delete", "event_bp", consumes=True)
+def _event_delete(ctx, concurrency):
+    def build(client):
+        event_id = client.take()
+        return ("DELETE", f"/api/event/{event_id}", None, None) if event_id else None
+    return [Client(build, random.Random(ctx.seed + n), session, ctx.throwaway_events(session.user_id))
+            for n, session in enumerate(ctx.vendors)]
+
+
+@scenario("admin.event_delete", "admin_bp", consumes=True)
+def _admin_event_delete(ctx, concurrency):
+    def build(client):
+        event_id = client.take()
+        return ("DELETE", f"/api/admin/admin/event/{event_id}", None, None) if event_id else None
+    organizer = ObjectId(ctx.vendors[0].user_id)
+    return _clients(ctx, concurrency, build, ctx.admins, items=ctx.throwaway_events(organizer, ctx.pool))
+
+
+@scenario("admin.user_delete", "admin_bp", consumes=True)
+def _admin_user_delete(ctx, concurrency):
+    def build(client):
+        user_id = client.take()
+        return ("DELETE", f"/api/admin/user/{user_id}", None, None) if user_id else None
+    return _clients(ctx, concurrency, build, ctx.admins, items=ctx.throwaway_users(ctx.pool))
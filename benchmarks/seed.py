@@ -0,0 +1,233 @@
+"""
+Seeds a throwaway MongoDB with a synthetic dataset for the benchmark suite
+(benchmarks/suite.py). Point it at a local server you don't mind wiping:
+
+    docker run -d -p 27017:27017 mongo:7
+    python benchmarks/seed.py --uri mongodb://localhost:27017/event_bench --scale small --drop
+
+Documents are written with raw batched inserts in the exact shape the
+models store, into the models' collections; indexes are built afterwards,
+as `flask audit-indexes --ensure` would, and the booking rollups are
+rebuilt from the bookings. The same --seed gives the same data.
+
+Every seeded user's password is PASSWORD. Emails follow the patterns below
+so the suite can log in as any of them.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import bcrypt
+from bson import ObjectId
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import Config  # noqa: E402
+from app.models.user_model import User  # noqa: E402
+from app.models.event_model import Event, SeatShard  # noqa: E402
+from app.models.booking_model import Booking  # noqa: E402
+from app.utils.index_audit import MODELS  # noqa: E402
+
+PASSWORD = "benchmark-password"
+ADMIN_EMAIL = "admin@bench.example"
+
+# (users, events, bookings)
+SCALES = {
+    "tiny": (1000, 10000, 50000),
+    "small": (10000, 100000, 1000000),
+    "medium": (50000, 500000, 5000000),
+    "large": (100000, 1000000, 10000000)
+}
+VENDOR_FRACTION = 0.05
+SHARDED_FRACTION = 0.01
+SEAT_SHARDS = 4
+BATCH_SIZE = 10000
+
+# country, city, latitude, longitude
+CITIES = [
+    ("Pakistan", "Lahore", 31.5204, 74.3587),
+    ("Pakistan", "Karachi", 24.8607, 67.0011),
+    ("Pakistan", "Islamabad", 33.6844, 73.0479),
+    ("United Kingdom", "London", 51.5072, -0.1276),
+    ("United Kingdom", "Manchester", 53.4808, -2.2426),
+    ("United States", "New York", 40.7128, -74.0060),
+    ("United States", "Austin", 30.2672, -97.7431),
+    ("Germany", "Berlin", 52.5200, 13.4050),
+    ("Japan", "Tokyo", 35.6762, 139.6503),
+    ("United Arab Emirates", "Dubai", 25.2048, 55.2708)
+]
+FIRST_NAMES = ["Ayesha", "Bilal", "Chen", "Diego", "Emma", "Fatima", "George", "Hana", "Imran", "Julia",
+               "Kenji", "Lena", "Omar", "Priya", "Sara", "Tom", "Usman", "Yara", "Zain", "José"]
+LAST_NAMES = ["Ahmed", "Brown", "Khan", "Lee", "Müller", "Novak", "Okafor", "Patel", "Rossi", "Silva",
+              "Smith", "Tanaka", "Walker", "Yilmaz", "Zhang"]
+KINDS = ["Jazz Night", "Tech Meetup", "Food Festival", "Book Fair", "Startup Pitch", "Art Expo",
+         "Comedy Show", "Marathon", "Film Screening", "Hackathon", "Yoga Retreat", "Rock Concert"]
+ADJECTIVES = ["Annual", "Summer", "Winter", "Open-Air", "Late", "Grand", "Community", "Indie", "Charity"]
+VENUES = ["Expo Centre", "City Hall", "Riverside Park", "Arts Council", "Convention Center", "Old Town Square"]
+
+START_DATE = datetime(2026, 1, 1)
+DATE_SPAN_DAYS = 3 * 365
+
+
+def customer_email(i):
+    return f"customer{i}@bench.example"
+
+
+def vendor_email(i):
+    return f"vendor{i}@bench.example"
+
+
+def _insert(collection, docs, label):
+    for start in range(0, len(docs), BATCH_SIZE):
+        collection.insert_many(docs[start:start + BATCH_SIZE], ordered=False)
+    print(f"  {label}: {len(docs)}")
+
+
+def hash_password():
+    # At the app's work factor, so logging in never triggers a rehash
+    return bcrypt.hashpw(PASSWORD.encode("utf-8"),
+                         bcrypt.gensalt(rounds=Config.BCRYPT_LOG_ROUNDS)).decode("utf-8")
+
+
+def user_doc(rng, email, role, password):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return {
+        "_id": ObjectId(), "name": name, "email": email, "password": password, "role": role,
+        "role_version": 0, "search_tokens": User.search_tokens_for(name, email)
+    }
+
+
+def event_doc(rng, number, organizer):
+    """A stored Event, unsharded: seats_available holds the inventory."""
+    country, city, latitude, longitude = rng.choice(CITIES)
+    kind = rng.choice(KINDS)
+    return {
+        "_id": ObjectId(),
+        "title": f"{rng.choice(ADJECTIVES)} {kind} {number}",
+        "description": f"{kind} in {city}, hosted at the {rng.choice(VENUES)}.",
+        "seats_available": rng.randint(100, 5000),
+        "seat_shards": 0,
+        "date": START_DATE + timedelta(minutes=rng.randrange(DATE_SPAN_DAYS * 24 * 60 // 15) * 15),
+        "country": country,
+        "city": city,
+        "location": rng.choice(VENUES),
+        "organizer": organizer,
+        "country_key": Event.location_key(country),
+        "city_key": Event.location_key(city),
+        # Scattered within ~20 km of the city centre
+        "coordinates": {"type": "Point", "coordinates": [
+            round(longitude + rng.uniform(-0.2, 0.2), 5), round(latitude + rng.uniform(-0.2, 0.2), 5)
+        ]}
+    }
+
+
+def seed_users(db, rng, count):
+    password = hash_password()
+    vendors = max(1, int(count * VENDOR_FRACTION))
+    customers = max(1, count - vendors - 1)
+
+    docs = [user_doc(rng, ADMIN_EMAIL, "admin", password)]
+    docs += [user_doc(rng, vendor_email(i), "vendor", password) for i in range(vendors)]
+    docs += [user_doc(rng, customer_email(i), "customer", password) for i in range(customers)]
+    _insert(db[User._get_collection_name()], docs, "users")
+
+    vendor_ids = [doc["_id"] for doc in docs if doc["role"] == "vendor"]
+    customer_ids = [doc["_id"] for doc in docs if doc["role"] == "customer"]
+    return vendor_ids, customer_ids
+
+
+def seed_events(db, rng, count, vendor_ids):
+    events, shards, event_ids = [], [], []
+    collection = db[Event._get_collection_name()]
+    for i in range(count):
+        event = event_doc(rng, i, rng.choice(vendor_ids))
+        if rng.random() < SHARDED_FRACTION:
+            # Like shard_event_seats(): the inventory moves into the shards
+            seats = event["seats_available"]
+            event["seat_shards"], event["seats_available"] = SEAT_SHARDS, 0
+            shards += [
+                {"event": event["_id"], "shard": n,
+                 "seats": seats // SEAT_SHARDS + (1 if n < seats % SEAT_SHARDS else 0)}
+                for n in range(SEAT_SHARDS)
+            ]
+        events.append(event)
+        event_ids.append(event["_id"])
+        if len(events) >= BATCH_SIZE:
+            collection.insert_many(events, ordered=False)
+            events = []
+    if events:
+        collection.insert_many(events, ordered=False)
+    print(f"  events: {count}")
+    _insert(db[SeatShard._get_collection_name()], shards, "seat shards")
+    return event_ids
+
+
+def seed_bookings(db, rng, count, customer_ids, event_ids):
+    # Spread evenly over customers; one booking per customer and event
+    collection = db[Booking._get_collection_name()]
+    per_customer, extra = divmod(count, len(customer_ids))
+    batch, total = [], 0
+    for n, customer_id in enumerate(customer_ids):
+        k = min(len(event_ids), per_customer + (1 if n < extra else 0))
+        for index in rng.sample(range(len(event_ids)), k):
+            batch.append({
+                "_id": ObjectId(), "customer": customer_id, "event": event_ids[index],
+                "booked_at": START_DATE - timedelta(minutes=rng.randrange(365 * 24 * 60))
+            })
+        if len(batch) >= BATCH_SIZE:
+            collection.insert_many(batch, ordered=False)
+            total += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        total += len(batch)
+    print(f"  bookings: {total}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default="mongodb://localhost:27017/event_bench")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--users", type=int, help="Overrides the scale's user count")
+    parser.add_argument("--events", type=int, help="Overrides the scale's event count")
+    parser.add_argument("--bookings", type=int, help="Overrides the scale's booking count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--drop", action="store_true", help="Drop the app's collections first")
+    args = parser.parse_args()
+
+    users, events, bookings = SCALES[args.scale]
+    users, events, bookings = args.users or users, args.events or events, args.bookings or bookings
+
+    client = MongoClient(args.uri)
+    db = client.get_default_database("event_bench")
+    names = [model._get_collection_name() for model in MODELS]
+    if args.drop:
+        for name in names:
+            db.drop_collection(name)
+    elif any(db[name].estimated_document_count() for name in names):
+        sys.exit(f"{db.name} already has data; pass --drop to replace it")
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    print(f"Seeding {db.name}: {users} users, {events} events, {bookings} bookings")
+    vendor_ids, customer_ids = seed_users(db, rng, users)
+    event_ids = seed_events(db, rng, events, vendor_ids)
+    seed_bookings(db, rng, bookings, customer_ids, event_ids)
+
+    # Indexes and rollups through the models, once the data is in
+    import mongoengine
+    from app.utils.booking_stats import rebuild_booking_stats
+    mongoengine.connect(host=args.uri)
+    print("Building indexes")
+    for model in MODELS:
+        model.ensure_indexes()
+    print("Rebuilding booking rollups")
+    rebuild_booking_stats()
+    print(f"Done in {time.perf_counter() - started:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Tracks how fast a fresh worker gets to its first response: the time to
+import the app package, to run create_app() and to serve a first request,
+plus the whole process from interpreter start, each the median of --runs
+fresh interpreters. It also lists the heavy modules that must not be
+imported before the first request.
+
+    python benchmarks/startup_budget.py
+    python benchmarks/startup_budget.py --budget benchmarks/startup_budget.json
+    python benchmarks/startup_budget.py --mode eager --runs 5
+
+The app starts with LAZY_STARTUP on (--mode lazy) and LOAD_DOTENV off, as
+on an autoscaled or serverless worker; no database is needed, the client
+only connects on the first query. With --budget the run fails (exit
+status 1) when a timing is over its limit for the mode in the budget
+file or a forbidden module was imported by create_app(). The limits in
+benchmarks/startup_budget.json leave about 1.5x headroom on a laptop;
+lower them when a change makes startup faster.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIMINGS = ("import_ms", "create_app_ms", "first_request_ms", "process_ms")
+
+# Runs in each fresh interpreter; prints one JSON line
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+created = time.perf_counter()
+loaded = sorted(sys.modules)
+response = flask_app.test_client().get(%(path)r)
+response.close()
+served = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (served - created) * 1000,
+    "status": response.status_code,
+    "modules": loaded
+}))
+"""
+
+
+def run_once(mode, path, uri):
+    env = dict(
+        os.environ,
+        LAZY_STARTUP="true" if mode == "lazy" else "false",
+        LOAD_DOTENV="false",
+        MONGODB_URI=os.environ.get("MONGODB_URI", uri),
+        PYTHONDONTWRITEBYTECODE="1"
+    )
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD % {"path": path}],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        sys.exit(f"The app failed to start:\n{result.stderr}")
+    run = json.loads(result.stdout.strip().splitlines()[-1])
+    run["process_ms"] = elapsed
+    return run
+
+
+def forbidden_loaded(modules, forbidden):
+    return sorted(
+        name for name in modules
+        if any(name == prefix or name.startswith(prefix + ".") for prefix in forbidden)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("lazy", "eager"), default="lazy", help="LAZY_STARTUP on or off")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--path", default="/api/auth/me", help="First request; should not need the database")
+    parser.add_argument("--uri", default="mongodb://localhost:27017/startup_budget",
+                        help="MONGODB_URI when it isn't set; never connected to")
+    parser.add_argument("--budget", help="JSON file of limits, e.g. benchmarks/startup_budget.json")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    # The first run warms the filesystem cache and the bytecode of site-packages
+    run_once(args.mode, args.path, args.uri)
+    runs = [run_once(args.mode, args.path, args.uri) for _ in range(args.runs)]
+
+    results = {name: round(statistics.median(run[name] for run in runs), 1) for name in TIMINGS}
+    results["mode"] = args.mode
+    results["first_status"] = runs[-1]["status"]
+    print(f"{args.mode} startup, median of {args.runs} runs:")
+    for name in TIMINGS:
+        print(f"  {name:<18}{results[name]:>8.1f}")
+    print(f"  first request     {args.path} -> {results['first_status']}")
+
+    failures = []
+    if args.budget:
+        with open(args.budget) as f:
+            budget = json.load(f)[args.mode]
+        for name in TIMINGS:
+            limit = budget.get(name)
+            if limit is not None and results[name] > limit:
+                failures.append(f"{name} {results[name]:.1f} > {limit}")
+        loaded = forbidden_loaded(runs[-1]["modules"], budget.get("forbidden_modules", []))
+        results["forbidden_loaded"] = loaded
+        if loaded:
+            failures.append("imported by create_app(): " + ", ".join(loaded))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if failures:
+        print("\nOver budget:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
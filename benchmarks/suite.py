@@ -0,0 +1,299 @@
+"""
+Load-tests every route of auth_bp, event_bp, booking_bp and admin_bp
+against a seeded database (benchmarks/seed.py) and reports throughput,
+p50/p95/p99 latency and Mongo commands per request for each.
+
+    python benchmarks/seed.py --uri mongodb://localhost:27017/event_bench --scale small --drop
+    python benchmarks/suite.py --uri mongodb://localhost:27017/event_bench --serve gunicorn \\
+        --output results.json --baseline benchmarks/baseline.json
+
+--serve starts the app itself with METRICS_QUERY_HEADERS on, which is how
+commands per request are measured; against an already running server
+(--base-url) turn that setting on there. Scenarios that create data run
+after the read-only ones, and the ones that delete data run last, on rows
+the suite inserts for them, so a run leaves the seeded data usable for
+the next one (reseed for exact repeatability).
+
+With --baseline, every scenario is compared to a previous --output file;
+the run fails (exit status 1) when throughput drops or p95 latency or
+commands per request grow by more than --tolerance.
+"""
+import argparse
+import fnmatch
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from http_load import run_clients  # noqa: E402
+from seed import (  # noqa: E402
+    ADMIN_EMAIL, PASSWORD, customer_email, vendor_email, hash_password, user_doc, event_doc
+)
+from scenarios import SCENARIOS, Session  # noqa: E402
+from app.models.user_model import User  # noqa: E402
+from app.models.event_model import Event  # noqa: E402
+from app.models.booking_model import Booking  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def request(base_url, method, path, body=None, headers=None):
+    """One request outside the measured runs; returns (status, headers, json)."""
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.netloc, timeout=60)
+    headers = dict(headers or {})
+    if body is not None:
+        body = json.dumps(body)
+        headers["Content-Type"] = "application/json"
+    try:
+        connection.request(method, parts.path.rstrip("/") + path, body=body, headers=headers)
+        response = connection.getresponse()
+        data = response.read()
+    finally:
+        connection.close()
+    try:
+        payload = json.loads(data) if data else None
+    except ValueError:
+        payload = None
+    return response.status, response.headers, payload
+
+
+class BenchContext:
+    """Logged-in sessions and ids of the seeded data, for the scenarios."""
+
+    def __init__(self, base_url, db, concurrency, seed, pool):
+        self.base_url = base_url
+        self.db = db
+        self.seed = seed
+        self.pool = pool
+        self.rng = random.Random(seed)
+        self.users = db[User._get_collection_name()]
+        self.events = db[Event._get_collection_name()]
+        self.bookings = db[Booking._get_collection_name()]
+
+        self.customer_count = self.users.count_documents({"email": {"$regex": "^customer[0-9]+@"}})
+        vendor_count = self.users.count_documents({"email": {"$regex": "^vendor[0-9]+@"}})
+        if not self.customer_count or not vendor_count:
+            sys.exit("No seeded users found; run benchmarks/seed.py first")
+
+        print(f"Logging in {concurrency} customers, {min(concurrency, vendor_count)} vendors and an admin")
+        self.customers = self.login_many([customer_email(i) for i in range(min(concurrency, self.customer_count))])
+        self.vendors = self.login_many([vendor_email(i) for i in range(min(concurrency, vendor_count))])
+        self.admins = self.login_many([ADMIN_EMAIL])
+        self._next_spare = len(self.customers)
+
+        self.event_ids = self.sample_events(5000)
+        self.vendor_events = {
+            session.user_id: [str(doc["_id"]) for doc in
+                              self.events.find({"organizer": ObjectId(session.user_id)}, {"_id": 1}).limit(200)]
+            for session in self.vendors
+        }
+        self._password = None
+
+    # --- Sessions ---
+
+    def login(self, email):
+        status, headers, payload = request(self.base_url, "POST", "/api/auth/login",
+                                           {"email": email, "password": PASSWORD})
+        if status != 200:
+            raise RuntimeError(f"Login as {email} failed: {status} {payload}")
+        user = self.users.find_one({"email": email}, {"_id": 1})
+        session = Session(str(user["_id"]), email, {})
+        session.update(headers)
+        return session
+
+    def login_many(self, emails):
+        # Logins are bcrypt-bound; run them side by side
+        sessions = [None] * len(emails)
+
+        def login(i):
+            sessions[i] = self.login(emails[i])
+
+        threads = [threading.Thread(target=login, args=(i,)) for i in range(len(emails))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if None in sessions:
+            sys.exit("Some logins failed; see above")
+        return sessions
+
+    def spare_customer_indexes(self, count):
+        """Seeded customers no session of this run is logged in as yet."""
+        start = self._next_spare
+        self._next_spare += count
+        return [i % self.customer_count for i in range(start, start + count)]
+
+    # --- Seeded data ---
+
+    def sample_events(self, count):
+        return [str(doc["_id"]) for doc in self.events.aggregate([{"$sample": {"size": count}},
+                                                                  {"$project": {"_id": 1}}])]
+
+    def unbooked_events(self, concurrency):
+        # Random events; the odds that a session's customer already booked one are tiny
+        return self.sample_events(max(1000, concurrency * 500))
+
+    def customer_bookings(self, user_id):
+        return [str(doc["_id"]) for doc in self.bookings.find({"customer": ObjectId(user_id)}, {"_id": 1})]
+
+    def idle_customer_ids(self, count):
+        busy = {ObjectId(session.user_id) for session in self.customers}
+        docs = self.users.aggregate([{"$match": {"role": "customer"}}, {"$sample": {"size": count}},
+                                     {"$project": {"_id": 1}}])
+        return [doc["_id"] for doc in docs if doc["_id"] not in busy]
+
+    def queue_ticket(self):
+        status, _, payload = request(self.base_url, "POST", f"/api/booking/{self.rng.choice(self.event_ids)}",
+                                     headers={"Cookie": self.customers[0].cookie_header()})
+        return payload["ticket"]["id"] if status == 202 else None
+
+    # --- Rows the deleting scenarios use up ---
+
+    def throwaway_events(self, organizer, count=None):
+        count = count or max(1, self.pool // len(self.vendors))
+        docs = [event_doc(self.rng, f"throwaway {n}", ObjectId(str(organizer))) for n in range(count)]
+        self.events.insert_many(docs)
+        return [str(doc["_id"]) for doc in docs]
+
+    def throwaway_users(self, count):
+        if self._password is None:
+            self._password = hash_password()
+        docs = [user_doc(self.rng, f"throwaway-{uuid.uuid4().hex}@bench.example", "customer", self._password)
+                for _ in range(count)]
+        self.users.insert_many(docs)
+        return [str(doc["_id"]) for doc in docs]
+
+
+def serve(kind, uri, port):
+    """Starts the app in a subprocess and waits until it answers."""
+    env = dict(os.environ, MONGODB_URI=uri, METRICS_QUERY_HEADERS="true")
+    if kind == "gunicorn":
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{port}", "run:app"]
+    else:
+        command = [sys.executable, "-m", "flask", "--app", "run:app", "run", "--port", str(port), "--with-threads"]
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if request(base_url, "GET", "/api/event/filter?limit=1")[0] == 200:
+                return process, base_url
+        except OSError:
+            pass
+        if process.poll() is not None:
+            sys.exit("The app exited during startup")
+        time.sleep(0.5)
+    process.terminate()
+    sys.exit("The app didn't start within 60s")
+
+
+def compare(baseline, results, tolerance):
+    """Prints the change of every scenario against `baseline`; returns the regressions."""
+    regressions = []
+    print(f"\n{'scenario':<26} {'req/s':>16} {'p95 ms':>18} {'queries/req':>14}")
+    for name, new in results.items():
+        old = baseline.get(name)
+        if not old or not new["requests"] or not old["requests"]:
+            continue
+        rps = new["rps"] / old["rps"] - 1 if old["rps"] else 0.0
+        p95 = new["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+        queries_old, queries_new = old.get("queries_per_request"), new.get("queries_per_request")
+        queries = (queries_new / queries_old - 1) if queries_old and queries_new is not None else 0.0
+
+        problems = []
+        if rps < -tolerance:
+            problems.append("throughput")
+        if p95 > tolerance:
+            problems.append("p95")
+        if queries > tolerance:
+            problems.append("queries")
+        if problems:
+            regressions.append((name, problems))
+        print(f"{name:<26} {new['rps']:>8} ({rps:+.0%}) {new['p95_ms']!s:>9} ({p95:+.0%}) "
+              f"{queries_new!s:>6} ({queries:+.0%}){'  REGRESSED: ' + ', '.join(problems) if problems else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default="mongodb://localhost:27017/event_bench",
+                        help="The seeded database, read for ids and credentials")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default="http://127.0.0.1:5000", help="An already running app")
+    target.add_argument("--serve", choices=("flask", "gunicorn"), help="Start the app against --uri")
+    parser.add_argument("--port", type=int, default=5099, help="Port for --serve")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=1, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--only", help="Comma-separated scenario or blueprint patterns, e.g. 'event.*,admin_bp'")
+    parser.add_argument("--pool", type=int, default=2000, help="Rows inserted for each deleting scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this earlier --output file")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative change, e.g. 0.15")
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.base_url
+    if args.serve:
+        process, base_url = serve(args.serve, args.uri, args.port)
+
+    try:
+        db = MongoClient(args.uri).get_default_database("event_bench")
+        ctx = BenchContext(base_url, db, args.concurrency, args.seed, args.pool)
+
+        patterns = args.only.split(",") if args.only else ["*"]
+        selected = [s for s in SCENARIOS
+                    if any(fnmatch.fnmatch(s.name, p) or fnmatch.fnmatch(s.blueprint, p) for p in patterns)]
+
+        results = {}
+        print(f"\n{'scenario':<26} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'queries':>8} {'errors':>7}")
+        for scenario in selected:
+            if args.warmup and not scenario.consumes:
+                run_clients(base_url, scenario.make_clients(ctx, args.concurrency), args.warmup)
+            clients = scenario.make_clients(ctx, args.concurrency)
+            if not clients:
+                print(f"{scenario.name:<26} skipped")
+                continue
+            stats = results[scenario.name] = run_clients(base_url, clients, args.duration)
+            print(f"{scenario.name:<26} {stats['rps']:>9} {stats['p50_ms']!s:>8} {stats['p95_ms']!s:>8} "
+                  f"{stats['p99_ms']!s:>8} {stats['queries_per_request']!s:>8} {stats['errors']:>7}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "created": datetime.utcnow().isoformat(timespec="seconds"),
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+                "dataset": {name: db[name].estimated_document_count() for name in db.list_collection_names()},
+                "scenarios": results
+            }, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["scenarios"]
+        regressions = compare(baseline, results, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} scenario(s) regressed beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,14 @@
 import os
-from dotenv import load_dotenv
-load_dotenv()
+
+# Containers and serverless platforms set the environment themselves
+if os.environ.get('LOAD_DOTENV', 'true').lower() == 'true':
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def _write_concern(value):
+    # "1" from the environment means one node, not a tag set named "1"
+    return int(value) if value and value.isdigit() else value
 
 
 class Config:
@@ -9,8 +17,32 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'a-fallback-jwt-key')
 
     MONGODB_SETTINGS = {
-        'host': os.environ.get('MONGODB_URI')
+        'host': os.environ.get('MONGODB_URI'),
+        # Connection pool of each worker process; size it so that
+        # workers x maxPoolSize stays well under the server's connection limit
+        'maxPoolSize': int(os.environ.get('MONGODB_MAX_POOL_SIZE', 50)),
+        'minPoolSize': int(os.environ.get('MONGODB_MIN_POOL_SIZE', 0)),
+        'maxIdleTimeMS': int(os.environ.get('MONGODB_MAX_IDLE_TIME_MS', 60000)),
+        'maxConnecting': int(os.environ.get('MONGODB_MAX_CONNECTING', 2)),  # new connections opened at once
+        'waitQueueTimeoutMS': int(os.environ.get('MONGODB_WAIT_QUEUE_TIMEOUT_MS', 2000)),  # wait for a free connection
+        'serverSelectionTimeoutMS': int(os.environ.get('MONGODB_SERVER_SELECTION_TIMEOUT_MS', 5000)),
+        'connectTimeoutMS': int(os.environ.get('MONGODB_CONNECT_TIMEOUT_MS', 5000)),
+        'socketTimeoutMS': int(os.environ.get('MONGODB_SOCKET_TIMEOUT_MS', 30000)),
+        'compressors': os.environ.get('MONGODB_COMPRESSORS'),  # e.g. "zstd,snappy,zlib"
+        'w': _write_concern(os.environ.get('MONGODB_WRITE_CONCERN')),  # e.g. "majority" or 1
+        # Don't connect until the first query, so a pre-forking server
+        # (gunicorn.conf.py) never hands its workers the parent's sockets
+        'connect': False
     }
+    # Read preference of the read-only event browsing endpoints, e.g.
+    # secondaryPreferred; -1 means no staleness limit
+    MONGODB_BROWSE_READ_PREFERENCE = os.environ.get('MONGODB_BROWSE_READ_PREFERENCE', 'primary')
+    MONGODB_BROWSE_MAX_STALENESS = int(os.environ.get('MONGODB_BROWSE_MAX_STALENESS', -1))  # seconds, 90+
+
+    # Import each controller on its first request instead of in create_app,
+    # for workers that start on the request path (autoscaling, serverless).
+    # Leave off for pre-forking servers, so workers fork with them loaded
+    LAZY_STARTUP = os.environ.get('LAZY_STARTUP', 'false').lower() == 'true'
 
     JWT_TOKEN_LOCATION = ['cookies']
     JWT_ACCESS_TOKEN_EXPIRES = int(os.environ.get('JWT_ACCESS_TOKEN_EXPIRES', 3600))  # Default: 1 hour
@@ -24,4 +56,88 @@ class Config:
 
     JWT_COOKIE_CSRF_PROTECT = False
 
+    # Upper bound for the optional seat_shards field of create_event
+    SEAT_SHARDS_MAX = int(os.environ.get('SEAT_SHARDS_MAX', 64))
+
+    # Admission queue for POST /api/booking/<event_id> during booking spikes
+    BOOKING_QUEUE_ENABLED = os.environ.get('BOOKING_QUEUE_ENABLED', 'false').lower() == 'true'
+    BOOKING_QUEUE_BACKEND = os.environ.get('BOOKING_QUEUE_BACKEND', 'memory')  # memory, mongo or "module:Class"
+    BOOKING_QUEUE_WORKERS = int(os.environ.get('BOOKING_QUEUE_WORKERS', 4))
+    BOOKING_QUEUE_RATE = int(os.environ.get('BOOKING_QUEUE_RATE', 200))  # bookings per second per process
+    BOOKING_QUEUE_MAX_SIZE = int(os.environ.get('BOOKING_QUEUE_MAX_SIZE', 10000))
+    BOOKING_QUEUE_TICKET_TTL = int(os.environ.get('BOOKING_QUEUE_TICKET_TTL', 3600))  # seconds a finished ticket is kept
+    # Tickets still "processing" after this long (their worker died) are queued again
+    BOOKING_QUEUE_LEASE = int(os.environ.get('BOOKING_QUEUE_LEASE', 60))  # seconds
+
+    # Most events one group booking may reserve
+    GROUP_BOOKING_MAX = int(os.environ.get('GROUP_BOOKING_MAX', 10))
+
+    # Cursor pagination of list endpoints
+    PAGE_SIZE_DEFAULT = int(os.environ.get('PAGE_SIZE_DEFAULT', 50))
+    PAGE_SIZE_MAX = int(os.environ.get('PAGE_SIZE_MAX', 500))
+    PAGINATION_COUNT_CAP = int(os.environ.get('PAGINATION_COUNT_CAP', 10000))  # for ?count=estimate
+    # Rows read per query by the streaming export endpoints
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+    # Pages of results ranked by relevance or distance stop after this many
+    RANKED_RESULTS_MAX = int(os.environ.get('RANKED_RESULTS_MAX', 1000))
+
+    # Bulk event import: rows per request and per insert batch
+    EVENT_IMPORT_MAX_ROWS = int(os.environ.get('EVENT_IMPORT_MAX_ROWS', 1000))
+    EVENT_IMPORT_BATCH_SIZE = int(os.environ.get('EVENT_IMPORT_BATCH_SIZE', 500))
+
+    # "Near me" event searches
+    EVENT_NEAR_RADIUS_KM = float(os.environ.get('EVENT_NEAR_RADIUS_KM', 25))
+    EVENT_NEAR_RADIUS_MAX_KM = float(os.environ.get('EVENT_NEAR_RADIUS_MAX_KM', 500))
+
+    # Admin user search ranks at most this many prefix matches
+    USER_SEARCH_CANDIDATES = int(os.environ.get('USER_SEARCH_CANDIDATES', 500))
+
+    # Cache for the public event read endpoints
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')  # memory or "module:Class"
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 30))  # seconds
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 5000))
+
+    # Prometheus metrics on GET /metrics (METRICS_TOKEN, if set, is required as a Bearer token)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Requests running more Mongo commands than this are logged and counted as likely N+1 queries
+    METRICS_QUERY_THRESHOLD = int(os.environ.get('METRICS_QUERY_THRESHOLD', 20))
+    # Adds an X-Mongo-Commands header to every response (for load tests)
+    METRICS_QUERY_HEADERS = os.environ.get('METRICS_QUERY_HEADERS', 'false').lower() == 'true'
+
+    # Stack-sampling profiler for live requests: admins send an X-Profile
+    # header, or PROFILER_SAMPLE_RATE of all requests are profiled
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'false').lower() == 'true'
+    PROFILER_SAMPLE_RATE = float(os.environ.get('PROFILER_SAMPLE_RATE', 0))  # 0.001 = one request in 1000
+    PROFILER_INTERVAL_MS = float(os.environ.get('PROFILER_INTERVAL_MS', 5))
+    PROFILER_MAX_OVERHEAD = float(os.environ.get('PROFILER_MAX_OVERHEAD', 0.02))  # of the time, for sampling
+    PROFILER_MAX_CONCURRENT = int(os.environ.get('PROFILER_MAX_CONCURRENT', 2))  # profiled requests per process
+    PROFILER_MAX_SECONDS = float(os.environ.get('PROFILER_MAX_SECONDS', 30))  # sampled per request
+    PROFILER_STORE = os.environ.get('PROFILER_STORE', 'memory')  # memory, mongo or "module:Class"
+    PROFILER_MAX_PROFILES = int(os.environ.get('PROFILER_MAX_PROFILES', 200))
+    PROFILER_MAX_PROFILE_BYTES = int(os.environ.get('PROFILER_MAX_PROFILE_BYTES', 256 * 1024))
+    PROFILER_MAX_STORE_BYTES = int(os.environ.get('PROFILER_MAX_STORE_BYTES', 16 * 1024 * 1024))  # memory store
+
+    # How long a process trusts its cached copy of a user's role_version
+    ROLE_VERSION_CACHE_TTL = int(os.environ.get('ROLE_VERSION_CACHE_TTL', 30))  # seconds
+
+    # Background poster uploads
+    POSTER_STORAGE_BACKEND = os.environ.get('POSTER_STORAGE_BACKEND', 'cloudinary')  # cloudinary, local or "module:Class"
+    POSTER_STORAGE_DIR = os.environ.get('POSTER_STORAGE_DIR', 'poster_storage')  # local backend only
+    POSTER_STORAGE_URL = os.environ.get('POSTER_STORAGE_URL', '/media')  # local backend only
+    POSTER_SPOOL_DIR = os.environ.get('POSTER_SPOOL_DIR', 'temp_uploads')
+    POSTER_UPLOAD_WORKERS = int(os.environ.get('POSTER_UPLOAD_WORKERS', 4))
+    POSTER_UPLOAD_RETRIES = int(os.environ.get('POSTER_UPLOAD_RETRIES', 3))
+    POSTER_UPLOAD_BACKOFF = float(os.environ.get('POSTER_UPLOAD_BACKOFF', 1.0))  # seconds, doubled per retry
+    POSTER_VARIANTS = {"thumbnail": 200, "card": 640, "full": 1600}  # longest side in pixels
+    POSTER_VARIANT_FORMAT = os.environ.get('POSTER_VARIANT_FORMAT', 'WEBP')
+    POSTER_VARIANT_QUALITY = int(os.environ.get('POSTER_VARIANT_QUALITY', 80))
+
+    # Password hashing pool (BCRYPT_LOG_ROUNDS is the bcrypt work factor)
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))  # 0 = one per CPU
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))  # seconds
+
     MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 10 MB upload limit
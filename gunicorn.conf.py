@@ -0,0 +1,39 @@
+"""
+Production settings for serving run:app with gunicorn:
+
+    gunicorn -c gunicorn.conf.py run:app
+
+Every worker is a separate process with its own Mongo connection pool
+(MONGODB_SETTINGS in config.py). The client is created with connect=False
+and the pools of the driver reset after fork, so preloading the app is safe:
+no worker inherits a socket from the parent. Keep
+workers x MONGODB_MAX_POOL_SIZE below the server's connection limit, and
+threads at or below MONGODB_MAX_POOL_SIZE so a worker never waits on its
+own pool.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+# Import the app once in the master, so workers fork with it loaded
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers now and then; the jitter keeps them from restarting
+# (and reconnecting to Mongo) all at once
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s forked; Mongo connections open on first query", worker.pid)